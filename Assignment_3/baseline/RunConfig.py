@@ -1,20 +1,25 @@
 from EventManager.Models.RunnerEvents import RunnerEvents
 from EventManager.EventSubscriptionController import EventSubscriptionController
-from ConfigValidator.Config.Models.RunTableModel import RunTableModel
-from ConfigValidator.Config.Models.FactorModel import FactorModel
-from ConfigValidator.Config.Models.RunnerContext import RunnerContext
 from ConfigValidator.Config.Models.OperationType import OperationType
 from ProgressManager.Output.OutputProcedure import OutputProcedure as output
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, TYPE_CHECKING
 from pathlib import Path
 from os.path import dirname, realpath
+import io
 import os
-import signal
-import pandas as pd
-import time
+from types import SimpleNamespace
 import subprocess
 
+# Add current directory to Python path for the shared factor levels
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+from _factors import SUBJECTS, GCS, WORKLOADS, JDKS
+
+if TYPE_CHECKING:
+    from ConfigValidator.Config.Models.RunnerContext import RunnerContext
+    from ConfigValidator.Config.Models.RunTableModel import RunTableModel
+
 class RunnerConfig:
     ROOT_DIR = Path(dirname(realpath(__file__)))
 
@@ -51,31 +56,49 @@ class RunnerConfig:
             (RunnerEvents.AFTER_EXPERIMENT , self.after_experiment )
         ])
         self.run_table_model = None  # Initialized later
+
+        # DUT settings, read from the environment once at config load
+        self.env = SimpleNamespace(
+            user=os.getenv('LAPTOP_USER', 'your_username'),
+            host=os.getenv('LAPTOP_HOST', '192.168.1.100'),
+            exp_dir=os.getenv('LAPTOP_EXPERIMENT_DIR', '/home/your_username/gc_experiment')
+        )
+        self.ssh_target = f'{self.env.user}@{self.env.host}'
+        # Command: run_single_experiment.sh <subject> <gc> <workload> <jdk> <rep> <run_num>
+        self._cmd_tmpl = f"cd {self.env.exp_dir} && ./run_single_experiment.sh {{s}} {{g}} {{w}} {{j}} {{r}} {{n}}"
+
+        # Persistent SSH connection (OpenSSH ControlMaster), opened in before_experiment
+        self.ssh_ctrl_path = f"/tmp/gc_{os.getpid()}.sock"
+        self._ssh_base = ['ssh', '-o', f'ControlPath={self.ssh_ctrl_path}']
+        self._scp_base = ['scp', '-o', f'ControlPath={self.ssh_ctrl_path}']
+
+        # Per-run log lines are buffered and written in blocks (see _flush_log)
+        self._log = io.StringIO()
+
+        # Energy traces are pulled every TRACE_FETCH_EVERY runs, so an interrupted experiment
+        # keeps the traces of all but its last few runs. Both counters live in the parent.
+        self.TRACE_FETCH_EVERY = 36
+        self._runs_started = 0
+        self._traces_fetched_to = 0
         output.console_log("Custom config loaded")
 
-    def create_run_table_model(self) -> RunTableModel:
+    def create_run_table_model(self) -> 'RunTableModel':
         """Create a RunTable and add our factors.
 
         Returns:
             RunTableModel: Model...
         """
+        from ConfigValidator.Config.Models.FactorModel import FactorModel
+        from ConfigValidator.Config.Models.RunTableModel import RunTableModel
+
         # Define experimental factors
-        subject_factor = FactorModel("subject", [
-            'DaCapo', 
-            'CLBG-BinaryTrees', 
-            'CLBG-Fannkuch', 
-            'CLBG-NBody',
-            'Rosetta', 
-            'PetClinic', 
-            'TodoApp', 
-            'ANDIE'
-        ])
+        subject_factor = FactorModel("subject", list(SUBJECTS))
         
-        gc_factor = FactorModel("gc", ['Serial', 'Parallel', 'G1'])
+        gc_factor = FactorModel("gc", list(GCS))
         
-        workload_factor = FactorModel("workload", ['Light', 'Medium', 'Heavy'])
+        workload_factor = FactorModel("workload", list(WORKLOADS))
         
-        jdk_factor = FactorModel("jdk", ['openjdk', 'oracle'])
+        jdk_factor = FactorModel("jdk", list(JDKS))
         
         # Create run table with 3 repetitions
         # Total runs: 8 subjects × 3 GC × 3 workload × 2 JDK × 3 reps = 432 runs
@@ -85,6 +108,7 @@ class RunnerConfig:
             exclude_variations=[],  # No exclusions
             data_columns=['energy_j', 'runtime_s', 'status']
         )
+        self._total_runs = len(self.run_table_model.get_all_rows())
         
         return self.run_table_model
 
@@ -95,19 +119,29 @@ class RunnerConfig:
         output.console_log("="*60)
         output.console_log("JAVA GC ENERGY EXPERIMENT - GREEN LAB 2025")
         output.console_log("="*60)
-        output.console_log(f"Total runs planned: {len(self.run_table_model.get_all_rows())}")
+        output.console_log(f"Total runs planned: {self._total_runs}")
         output.console_log(f"Results path: {self.results_output_path}")
         output.console_log("")
-        
+
         # Test SSH connection to Linux laptop
         output.console_log("Testing SSH connection to DUT (Linux laptop)...")
+        if self.env.user == 'your_username':
+            output.console_log("✗ LAPTOP_USER is not set - using placeholder DUT settings!")
         
-        laptop_user = os.getenv('LAPTOP_USER', 'your_username')
-        laptop_host = os.getenv('LAPTOP_HOST', '192.168.1.100')
         
         try:
+            # Open the master connection once; every later ssh/scp reuses it
+            subprocess.run(
+                ['ssh', '-MNf',
+                 '-o', f'ControlPath={self.ssh_ctrl_path}',
+                 '-o', 'ControlMaster=yes',
+                 '-o', 'ControlPersist=600',
+                 self.ssh_target],
+                timeout=30
+            )
+            # Ask the master whether it is up; no new connection is made
             result = subprocess.run(
-                ['ssh', f'{laptop_user}@{laptop_host}', 'echo "SSH test successful"'],
+                ['ssh', '-O', 'check', '-o', f'ControlPath={self.ssh_ctrl_path}', self.ssh_target],
                 capture_output=True,
                 text=True,
                 timeout=10
@@ -124,146 +158,111 @@ class RunnerConfig:
         """Perform any activity required before starting a run.
         No context is available here as the run is not yet active (BEFORE RUN)"""
         
+        if self._runs_started - self._traces_fetched_to >= self.TRACE_FETCH_EVERY:
+            self._fetch_energy_traces(self._traces_fetched_to + 1, self._runs_started)
+            self._traces_fetched_to = self._runs_started
+
         output.console_log("")
         output.console_log("─" * 50)
         output.console_log("Preparing for next run...")
+        # Counted here, in the parent: the run hooks execute in a forked process
+        self._runs_started += 1
 
-    def start_run(self, context: RunnerContext) -> None:
+    def start_run(self, context: 'RunnerContext') -> None:
         """Perform any activity required for starting the run here.
         For example, starting the target system to measure.
         Activities after starting the run should also be performed here."""
         
-        output.console_log("")
-        output.console_log("="*60)
-        output.console_log(f"STARTING RUN #{context.run_nr}")
-        output.console_log("="*60)
-        output.console_log(f"Subject:  {context.run_variation['subject']}")
-        output.console_log(f"GC:       {context.run_variation['gc']}")
-        output.console_log(f"Workload: {context.run_variation['workload']}")
-        output.console_log(f"JDK:      {context.run_variation['jdk']}")
-        output.console_log(f"Rep:      {context.run_variation['__rep__']}")
-        output.console_log("")
+        v = context.run_variation
+        subject, gc, workload, jdk, rep = v['subject'], v['gc'], v['workload'], v['jdk'], v['__rep__']
+        
+        self._log_line("")
+        self._log_line("="*60)
+        self._log_line(f"STARTING RUN #{context.run_nr}")
+        self._log_line("="*60)
+        self._log_line(f"Subject:  {subject}")
+        self._log_line(f"GC:       {gc}")
+        self._log_line(f"Workload: {workload}")
+        self._log_line(f"JDK:      {jdk}")
+        self._log_line(f"Rep:      {rep}")
+        self._log_line("")
 
-    def start_measurement(self, context: RunnerContext) -> None:
+    def start_measurement(self, context: 'RunnerContext') -> None:
         """Perform any activity required for starting measurements."""
         
-        output.console_log("Starting energy measurement...")
-        
-        # Get laptop configuration from environment
-        laptop_user = os.getenv('LAPTOP_USER', 'your_username')
-        laptop_host = os.getenv('LAPTOP_HOST', '192.168.1.100')
-        laptop_exp_dir = os.getenv('LAPTOP_EXPERIMENT_DIR', '/home/your_username/gc_experiment')
+        self._log_line("Starting energy measurement...")
         
         # Build command to execute on laptop
-        subject = context.run_variation['subject']
-        gc = context.run_variation['gc']
-        workload = context.run_variation['workload']
-        jdk = context.run_variation['jdk']
-        rep = context.run_variation['__rep__']
-        run_num = context.run_nr
-        
-        # Command: run_single_experiment.sh <subject> <gc> <workload> <jdk> <rep> <run_num>
-        remote_cmd = (
-            f"cd {laptop_exp_dir} && "
-            f"./run_single_experiment.sh {subject} {gc} {workload} {jdk} {rep} {run_num}"
-        )
+        v = context.run_variation
+        subject, gc, workload, jdk, rep = v['subject'], v['gc'], v['workload'], v['jdk'], v['__rep__']
+        remote_cmd = self._cmd_tmpl.format(s=subject, g=gc, w=workload, j=jdk, r=rep, n=context.run_nr)
         
         # Execute via SSH (non-blocking for now - we'll wait in interact())
-        output.console_log(f"Executing on DUT: {remote_cmd}")
+        self._log_line(f"Executing on DUT: {remote_cmd}")
         
         # Store command in context for later
         context.ssh_command = remote_cmd
-        context.laptop_user = laptop_user
-        context.laptop_host = laptop_host
-        context.laptop_exp_dir = laptop_exp_dir
 
-    def interact(self, context: RunnerContext) -> None:
+    def interact(self, context: 'RunnerContext') -> None:
         """Perform any interaction with the running target system here, or block here until the target finishes."""
         
-        # Execute the SSH command and wait for completion
-        ssh_cmd = ['ssh', f'{context.laptop_user}@{context.laptop_host}', context.ssh_command]
-        
-        output.console_log("Waiting for experiment to complete on DUT...")
+        self._log_line("Waiting for experiment to complete on DUT...")
+        self._flush_log()
         
         try:
-            # Execute with timeout (15 minutes max per run)
-            result = subprocess.run(
-                ssh_cmd,
-                capture_output=True,
+            # Execute the SSH command and wait for completion (15 minutes max per run)
+            result = self._ssh_run(
+                self.ssh_target,
+                context.ssh_command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
                 timeout=900
             )
             
             context.ssh_returncode = result.returncode
-            context.ssh_stdout = result.stdout
             context.ssh_stderr = result.stderr
             
+            # The DUT script echoes its result.csv line after a '##RESULT## ' marker
+            context.dut_result_line = self._find_result_line(result.stdout)
+            
             if result.returncode == 0:
-                output.console_log("✓ Run completed successfully on DUT")
+                self._log_line("✓ Run completed successfully on DUT")
             else:
-                output.console_log(f"✗ Run FAILED with return code {result.returncode}")
-                output.console_log(f"  stderr: {result.stderr[:500]}")
+                self._log_line(f"✗ Run FAILED with return code {result.returncode}")
+                self._log_line(f"  stderr: {result.stderr[:500]}")
                 
         except subprocess.TimeoutExpired:
-            output.console_log("✗ Run TIMEOUT (exceeded 15 minutes)")
+            self._log_line("✗ Run TIMEOUT (exceeded 15 minutes)")
             context.ssh_returncode = -1
-            context.ssh_stdout = ""
             context.ssh_stderr = "TIMEOUT"
+            context.dut_result_line = None
 
-    def stop_measurement(self, context: RunnerContext) -> None:
+    def stop_measurement(self, context: 'RunnerContext') -> None:
         """Perform any activity here required for stopping measurements."""
         
-        output.console_log("Stopping measurement and retrieving results...")
+        self._log_line("Stopping measurement and retrieving results...")
         
-        if context.ssh_returncode == 0:
-            # Copy results from laptop to Pi
-            remote_result_dir = f"{context.laptop_exp_dir}/results/run_{context.run_nr}"
-            local_result_dir = context.run_dir / "dut_results"
-            local_result_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Copy energy CSV
-            scp_cmd = [
-                'scp',
-                f'{context.laptop_user}@{context.laptop_host}:{remote_result_dir}/energy.csv',
-                str(local_result_dir / 'energy.csv')
-            ]
-            
-            result = subprocess.run(scp_cmd, capture_output=True)
-            
-            if result.returncode == 0:
-                output.console_log("  ✓ Retrieved energy.csv")
-            else:
-                output.console_log("  ✗ Failed to retrieve energy.csv")
-            
-            # Copy result summary
-            scp_cmd = [
-                'scp',
-                f'{context.laptop_user}@{context.laptop_host}:{remote_result_dir}/result.csv',
-                str(local_result_dir / 'result.csv')
-            ]
-            
-            result = subprocess.run(scp_cmd, capture_output=True)
-            
-            if result.returncode == 0:
-                output.console_log("  ✓ Retrieved result.csv")
-            else:
-                output.console_log("  ✗ Failed to retrieve result.csv")
+        if context.ssh_returncode == 0 and context.dut_result_line is None:
+            # No result line on stdout (older DUT script): copy result.csv
+            self._fetch_results(context)
 
-    def stop_run(self, context: RunnerContext) -> None:
+    def stop_run(self, context: 'RunnerContext') -> None:
         """Perform any activity here required for stopping the run.
         Activities after stopping the run should also be performed here."""
         
-        output.console_log("")
-        output.console_log(f"Run #{context.run_nr} complete")
-        output.console_log("─" * 50)
+        self._log_line("")
+        self._log_line(f"Run #{context.run_nr} complete")
+        self._log_line("─" * 50)
 
-    def populate_run_data(self, context: RunnerContext) -> Optional[Dict[str, Any]]:
+    def populate_run_data(self, context: 'RunnerContext') -> Optional[Dict[str, Any]]:
         """Parse and process any measurement data here.
         You can also store the raw measurement data under `context.run_dir`
         Returns:
             Dict[str, Any]: Dictionary containing measurements for this run."""
         
-        output.console_log("Parsing run data...")
+        self._log_line("Parsing run data...")
         
         # Default values
         run_data = {
@@ -272,34 +271,36 @@ class RunnerConfig:
             'status': 'FAILED'
         }
         
-        # Try to read result.csv from laptop
+        # Prefer the result line echoed over SSH; fall back to the fetched result.csv
         result_file = context.run_dir / "dut_results" / "result.csv"
+        result_line = None
+        if context.dut_result_line is not None:
+            result_line = context.dut_result_line.encode()
+        elif result_file.is_file():
+            result_line = result_file.read_bytes()
         
-        if result_file.exists():
+        if result_line is not None:
             try:
-                # Parse the result line
-                with open(result_file, 'r') as f:
-                    result_line = f.read().strip()
-                
                 # Format: run_num,subject,gc,workload,jdk,rep,runtime_s,energy_j,status,timestamp
-                parts = result_line.split(',')
+                parts = result_line.rstrip().split(b',', 9)
                 
                 if len(parts) >= 9:
-                    run_data['runtime_s'] = float(parts[6]) if parts[6] != 'FAILED' else None
-                    run_data['energy_j'] = float(parts[7]) if parts[7] != 'FAILED' else None
-                    run_data['status'] = parts[8]
+                    run_data['runtime_s'] = float(parts[6]) if parts[6] != b'FAILED' else None
+                    run_data['energy_j'] = float(parts[7]) if parts[7] != b'FAILED' else None
+                    run_data['status'] = parts[8].decode()
                     
-                    output.console_log(f"  Runtime: {run_data['runtime_s']}s")
-                    output.console_log(f"  Energy:  {run_data['energy_j']}J")
-                    output.console_log(f"  Status:  {run_data['status']}")
+                    self._log_line(f"  Runtime: {run_data['runtime_s']}s")
+                    self._log_line(f"  Energy:  {run_data['energy_j']}J")
+                    self._log_line(f"  Status:  {run_data['status']}")
                 else:
-                    output.console_log("  ✗ Invalid result format")
+                    self._log_line("  ✗ Invalid result format")
                     
             except Exception as e:
-                output.console_log(f"  ✗ Error parsing results: {e}")
+                self._log_line(f"  ✗ Error parsing results: {e}")
         else:
-            output.console_log("  ✗ Result file not found")
+            self._log_line("  ✗ Result not reported by DUT")
         
+        self._flush_log()
         return run_data
 
     def after_experiment(self) -> None:
@@ -310,6 +311,8 @@ class RunnerConfig:
         output.console_log("="*60)
         output.console_log("EXPERIMENT COMPLETED")
         output.console_log("="*60)
+        # Earlier runs were fetched at their checkpoint; only the remainder is left
+        self._fetch_energy_traces(self._traces_fetched_to + 1, self._total_runs)
         output.console_log(f"Results saved to: {self.results_output_path}")
         output.console_log("")
         output.console_log("Next steps:")
@@ -318,5 +321,80 @@ class RunnerConfig:
         output.console_log("  3. Begin statistical analysis in R")
         output.console_log("")
 
+        # Tear down the persistent SSH connection
+        subprocess.run(
+            ['ssh', '-O', 'exit', '-o', f'ControlPath={self.ssh_ctrl_path}', self.ssh_target],
+            capture_output=True
+        )
+
+    @staticmethod
+    def _find_result_line(stdout: str) -> Optional[str]:
+        """Return the result.csv line the DUT script echoed after '##RESULT## ', if any."""
+        for line in stdout.splitlines():
+            if line.startswith('##RESULT## '):
+                return line[len('##RESULT## '):]
+        return None
+
+    def _log_line(self, txt: str) -> None:
+        """Buffer a per-run log line until the next `_flush_log`."""
+        self._log.write(txt + '\n')
+
+    def _flush_log(self) -> None:
+        """Write the buffered per-run log lines to the console in one call."""
+        if self._log.tell():
+            output.console_log(self._log.getvalue().rstrip('\n'))
+            self._log = io.StringIO()
+
+    def _fetch_results(self, context: 'RunnerContext') -> None:
+        """Copy result.csv for this run from the DUT into the run directory.
+        The energy traces are fetched in blocks by `_fetch_energy_traces`."""
+        remote_result_dir = f"{self.env.exp_dir}/results/run_{context.run_nr}"
+        local_result_dir = context.run_dir / "dut_results"
+        local_result_dir.mkdir(parents=True, exist_ok=True)
+        
+        result = self._scp_fetch(self.ssh_target, [f'{remote_result_dir}/result.csv'], local_result_dir)
+        
+        if (local_result_dir / 'result.csv').exists():
+            self._log_line("  ✓ Retrieved result.csv")
+        else:
+            self._log_line("  ✗ Failed to retrieve result.csv")
+            self._log_line(f"  stderr: {result.stderr.decode(errors='replace')[:500]}")
+
+    def _fetch_energy_traces(self, first_run: int, last_run: int) -> None:
+        """Stream the energy.csv files of runs `first_run`..`last_run` from the DUT as a single tar
+        archive into `<results_output_path>/<name>/dut_results/run_<n>/energy.csv`."""
+        stage_dir = self.results_output_path / self.name / 'dut_results'
+        stage_dir.mkdir(parents=True, exist_ok=True)
+        
+        output.console_log("Retrieving energy traces from DUT...")
+        # Only the requested run numbers; earlier blocks and other run_* dirs on the DUT are left alone
+        remote_tar = (f"cd {self.env.exp_dir}/results && "
+                      f"for n in $(seq {first_run} {last_run}); do "
+                      f"[ -f run_$n/energy.csv ] && echo run_$n/energy.csv; done | tar -cf - -T -")
+        ssh = subprocess.Popen(self._ssh_base + [self.ssh_target, remote_tar],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        untar = subprocess.run(['tar', '-xf', '-', '-C', str(stage_dir)], stdin=ssh.stdout,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        ssh.stdout.close()
+        ssh.wait()
+        
+        if ssh.returncode == 0 and untar.returncode == 0:
+            output.console_log(f"  ✓ Energy traces saved to: {stage_dir}")
+        else:
+            output.console_log("  ✗ Failed to retrieve energy traces")
+
+    def _ssh_run(self, target: str, remote_cmd: str, **kwargs) -> subprocess.CompletedProcess:
+        """Run a command on the DUT over the shared SSH connection."""
+        return subprocess.run(self._ssh_base + [target, remote_cmd], **kwargs)
+
+    def _scp_fetch(self, target: str, remote_paths: List[str], local_dir: Path) -> subprocess.CompletedProcess:
+        """Copy files from the DUT into `local_dir` with a single scp over the shared SSH connection."""
+        sources = [f'{target}:{path}' for path in remote_paths]
+        try:
+            return subprocess.run(self._scp_base + sources + [str(local_dir)], stdin=subprocess.DEVNULL,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=60)
+        except subprocess.TimeoutExpired as e:
+            return subprocess.CompletedProcess(e.cmd, -1, None, b'scp timed out')
+
     # ================================ DO NOT ALTER BELOW THIS LINE ================================
     experiment_path:            Path             = None
\ No newline at end of file
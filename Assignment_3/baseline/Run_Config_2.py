@@ -1,17 +1,27 @@
 from EventManager.Models.RunnerEvents import RunnerEvents
 from EventManager.EventSubscriptionController import EventSubscriptionController
-from ConfigValidator.Config.Models.RunTableModel import RunTableModel
-from ConfigValidator.Config.Models.FactorModel import FactorModel
-from ConfigValidator.Config.Models.RunnerContext import RunnerContext
 from ConfigValidator.Config.Models.OperationType import OperationType
 from ProgressManager.Output.OutputProcedure import OutputProcedure as output
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, TYPE_CHECKING
 from pathlib import Path
 from os.path import dirname, realpath
+import io
 import os
+import signal
+import threading
+from types import SimpleNamespace
 import subprocess
 
+# Add current directory to Python path for the shared factor levels
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+from _factors import SUBJECTS, GCS, WORKLOADS, JDKS
+
+if TYPE_CHECKING:
+    from ConfigValidator.Config.Models.RunnerContext import RunnerContext
+    from ConfigValidator.Config.Models.RunTableModel import RunTableModel
+
 class RunnerConfig:
     ROOT_DIR = Path(dirname(realpath(__file__)))
 
@@ -46,30 +56,42 @@ class RunnerConfig:
         ])
         self.run_table_model = None  # Initialized later
 
+        # DUT settings, read from the environment once at config load
+        self.env = SimpleNamespace(
+            user=os.getenv('LAPTOP_USER', 'vivekbharadwaj99'),
+            host=os.getenv('LAPTOP_HOST', '192.168.50.1'),
+            exp_dir=os.getenv('LAPTOP_EXPERIMENT_DIR', '/home/vivekbharadwaj99/greenlab-dut')
+        )
+        self.ssh_target = f'{self.env.user}@{self.env.host}'
+        self._cmd_tmpl = f"cd {self.env.exp_dir} && ./run_single_experiment.sh {{s}} {{g}} {{w}} {{j}} {{r}} {{n}}"
+
+        # Persistent SSH connection (OpenSSH ControlMaster), opened in before_experiment
+        self.ssh_ctrl_path = f"/tmp/gc_{os.getpid()}.sock"
+        self._ssh_base = ['ssh', '-o', f'ControlPath={self.ssh_ctrl_path}']
+        self._scp_base = ['scp', '-o', f'ControlPath={self.ssh_ctrl_path}']
+
+        # Per-run log lines are buffered and written in blocks (see _flush_log)
+        self._log = io.StringIO()
+
         # Batch tracking
         self.current_batch = 1
         self.runs_in_batch = 0
         self.BATCH_SIZE = 36  # Run 36 experiments at once
+        self.REVIEW_TIMEOUT_S = int(os.getenv('GC_REVIEW_TIMEOUT_S', '300'))  # Auto-resume after batch review
 
         output.console_log("Custom config loaded (Hybrid version with batching)")
 
-    def create_run_table_model(self) -> RunTableModel:
+    def create_run_table_model(self) -> 'RunTableModel':
         """Create a RunTable and add our factors."""
+        from ConfigValidator.Config.Models.FactorModel import FactorModel
+        from ConfigValidator.Config.Models.RunTableModel import RunTableModel
+
         # 8 subjects as per old config
-        subject_factor = FactorModel("subject", [
-            'DaCapo', 
-            'CLBG-BinaryTrees', 
-            'CLBG-Fannkuch', 
-            'CLBG-NBody',
-            'Rosetta', 
-            'PetClinic', 
-            'TodoApp', 
-            'ANDIE'
-        ])
+        subject_factor = FactorModel("subject", list(SUBJECTS))
         
-        gc_factor = FactorModel("gc", ['Serial', 'Parallel', 'G1'])
-        workload_factor = FactorModel("workload", ['Light', 'Medium', 'Heavy'])
-        jdk_factor = FactorModel("jdk", ['openjdk', 'oracle'])
+        gc_factor = FactorModel("gc", list(GCS))
+        workload_factor = FactorModel("workload", list(WORKLOADS))
+        jdk_factor = FactorModel("jdk", list(JDKS))
         
         # Create run table with 3 repetitions
         self.run_table_model = RunTableModel(
@@ -77,6 +99,8 @@ class RunnerConfig:
             exclude_variations=[],  # No exclusions
             data_columns=['energy_j', 'runtime_s', 'status', 'batch_num']
         )
+        self._total_runs = len(self.run_table_model.get_all_rows())
+        self._total_batches = (self._total_runs + self.BATCH_SIZE - 1) // self.BATCH_SIZE
         return self.run_table_model
 
     def before_experiment(self) -> None:
@@ -84,22 +108,26 @@ class RunnerConfig:
         output.console_log("JAVA GC ENERGY EXPERIMENT - GREEN LAB 2025")
         output.console_log("="*60)
         
-        total_runs = len(self.run_table_model.get_all_rows())
-        total_batches = (total_runs + self.BATCH_SIZE - 1) // self.BATCH_SIZE
-        
-        output.console_log(f"Total runs planned: {total_runs}")
+        output.console_log(f"Total runs planned: {self._total_runs}")
         output.console_log(f"Batch size: {self.BATCH_SIZE} runs")
-        output.console_log(f"Total batches: {total_batches}")
+        output.console_log(f"Total batches: {self._total_batches}")
         output.console_log(f"Results path: {self.results_output_path}")
         output.console_log("")
 
         # Test SSH connection to DUT
         output.console_log("Testing SSH connection to DUT (Linux laptop)...")
-        laptop_user = os.getenv('LAPTOP_USER', 'vivekbharadwaj99')
-        laptop_host = os.getenv('LAPTOP_HOST', '192.168.50.1')
         try:
+            # Open the master connection once; every later ssh/scp reuses it
+            subprocess.run(
+                ['ssh', '-MNf',
+                 '-o', f'ControlPath={self.ssh_ctrl_path}',
+                 '-o', 'ControlMaster=yes',
+                 '-o', 'ControlPersist=600',
+                 self.ssh_target],
+                timeout=30
+            )
             result = subprocess.run(
-                ['ssh', f'{laptop_user}@{laptop_host}', 'echo "SSH test successful"'],
+                ['ssh', '-O', 'check', '-o', f'ControlPath={self.ssh_ctrl_path}', self.ssh_target],
                 capture_output=True, text=True, timeout=10
             )
             if result.returncode == 0:
@@ -112,124 +140,122 @@ class RunnerConfig:
 
     def before_run(self) -> None:
         if self.runs_in_batch >= self.BATCH_SIZE:
+            # Pull the finished batch's energy traces while the review window is open. The thread runs
+            # in the parent (this hook is not forked) and is joined before the next run is forked.
+            trace_fetch = threading.Thread(target=self._fetch_energy_traces,
+                                           args=((self.current_batch - 1) * self.BATCH_SIZE + 1,
+                                                 self.current_batch * self.BATCH_SIZE))
+            trace_fetch.start()
             output.console_log("")
             output.console_log("╔" + "═"*58 + "╗")
             output.console_log(f"║  BATCH {self.current_batch} COMPLETE - {self.BATCH_SIZE} runs executed  ║")
-            output.console_log("║  Pausing for batch review... Press ENTER to continue  ║")
+            output.console_log(f"║{'Pausing for batch review (' + str(self.REVIEW_TIMEOUT_S) + ' s)':^58}║")
+            output.console_log(f"║{'kill -USR1 ' + str(os.getpid()) + ' to continue early':^58}║")
             output.console_log("╚" + "═"*58 + "╝")
             
             try:
-                input()  # Wait for user to continue
+                reason = self._wait_for_review()
                 self.current_batch += 1
                 self.runs_in_batch = 0
-                output.console_log(f"\nStarting BATCH {self.current_batch}...")
+                output.console_log(f"\nResumed ({reason}). Starting BATCH {self.current_batch}...")
             except KeyboardInterrupt:
                 output.console_log("\n✗ Experiment stopped by user")
                 raise
+            finally:
+                # Also on Ctrl-C, so the batch's traces are complete on disk before exiting
+                trace_fetch.join()
 
         output.console_log("")
         output.console_log("─" * 50)
         output.console_log("Preparing for next run...")
 
-    def start_run(self, context: RunnerContext) -> None:
+        # Counted here, in the parent: start_run runs in the forked run process, so a count
+        # kept there never reaches the batch check above
         self.runs_in_batch += 1
-        output.console_log("")
-        output.console_log("="*60)
-        output.console_log(f"STARTING RUN #{context.run_nr} (Batch {self.current_batch}, Run {self.runs_in_batch}/{self.BATCH_SIZE})")
-        output.console_log("="*60)
-        output.console_log(f"Subject:  {context.run_variation['subject']}")
-        output.console_log(f"GC:       {context.run_variation['gc']}")
-        output.console_log(f"Workload: {context.run_variation['workload']}")
-        output.console_log(f"JDK:      {context.run_variation['jdk']}")
-        output.console_log(f"Rep:      {context.run_variation['__rep__']}")
-        output.console_log("")
 
-    def start_measurement(self, context: RunnerContext) -> None:
-        output.console_log("Starting energy measurement...")
-        laptop_user = os.getenv('LAPTOP_USER', 'vivekbharadwaj99')
-        laptop_host = os.getenv('LAPTOP_HOST', '192.168.50.1')
-        laptop_exp_dir = os.getenv('LAPTOP_EXPERIMENT_DIR', '/home/vivekbharadwaj99/greenlab-dut')
-
-        subject = context.run_variation['subject']
-        gc = context.run_variation['gc']
-        workload = context.run_variation['workload']
-        jdk = context.run_variation['jdk']
-        rep = context.run_variation['__rep__']
-        run_num = context.run_nr
-
-        remote_cmd = (
-            f"cd {laptop_exp_dir} && "
-            f"./run_single_experiment.sh {subject} {gc} {workload} {jdk} {rep} {run_num}"
-        )
-        output.console_log(f"Executing on DUT: {remote_cmd}")
+    def start_run(self, context: 'RunnerContext') -> None:
+        v = context.run_variation
+        subject, gc, workload, jdk, rep = v['subject'], v['gc'], v['workload'], v['jdk'], v['__rep__']
+        self._log_line("")
+        self._log_line("="*60)
+        self._log_line(f"STARTING RUN #{context.run_nr} (Batch {self.current_batch}, Run {self.runs_in_batch}/{self.BATCH_SIZE})")
+        self._log_line("="*60)
+        self._log_line(f"Subject:  {subject}")
+        self._log_line(f"GC:       {gc}")
+        self._log_line(f"Workload: {workload}")
+        self._log_line(f"JDK:      {jdk}")
+        self._log_line(f"Rep:      {rep}")
+        self._log_line("")
+
+    def start_measurement(self, context: 'RunnerContext') -> None:
+        self._log_line("Starting energy measurement...")
+
+        v = context.run_variation
+        subject, gc, workload, jdk, rep = v['subject'], v['gc'], v['workload'], v['jdk'], v['__rep__']
+        remote_cmd = self._cmd_tmpl.format(s=subject, g=gc, w=workload, j=jdk, r=rep, n=context.run_nr)
+        self._log_line(f"Executing on DUT: {remote_cmd}")
 
         context.ssh_command = remote_cmd
-        context.laptop_user = laptop_user
-        context.laptop_host = laptop_host
-        context.laptop_exp_dir = laptop_exp_dir
         context.batch_num = self.current_batch
 
-    def interact(self, context: RunnerContext) -> None:
-        ssh_cmd = ['ssh', f'{context.laptop_user}@{context.laptop_host}', context.ssh_command]
-        output.console_log("Waiting for experiment to complete on DUT...")
+    def interact(self, context: 'RunnerContext') -> None:
+        self._log_line("Waiting for experiment to complete on DUT...")
+        self._flush_log()
         try:
-            result = subprocess.run(ssh_cmd, capture_output=True, text=True, timeout=900)
+            result = self._ssh_run(self.ssh_target, context.ssh_command,
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, text=True, timeout=900)
             context.ssh_returncode = result.returncode
-            context.ssh_stdout = result.stdout
             context.ssh_stderr = result.stderr
+            context.dut_result_line = self._find_result_line(result.stdout)
             if result.returncode == 0:
-                output.console_log("✓ Run completed successfully on DUT")
+                self._log_line("✓ Run completed successfully on DUT")
             else:
-                output.console_log(f"✗ Run FAILED with return code {result.returncode}")
-                output.console_log(f"  stderr: {result.stderr[:500]}")
+                self._log_line(f"✗ Run FAILED with return code {result.returncode}")
+                self._log_line(f"  stderr: {result.stderr[:500]}")
         except subprocess.TimeoutExpired:
-            output.console_log("✗ Run TIMEOUT (exceeded 15 minutes)")
+            self._log_line("✗ Run TIMEOUT (exceeded 15 minutes)")
             context.ssh_returncode = -1
-            context.ssh_stdout = ""
             context.ssh_stderr = "TIMEOUT"
+            context.dut_result_line = None
 
-    def stop_measurement(self, context: RunnerContext) -> None:
-        output.console_log("Stopping measurement and retrieving results...")
-        if context.ssh_returncode == 0:
-            remote_result_dir = f"{context.laptop_exp_dir}/results/run_{context.run_nr}"
-            local_result_dir = context.run_dir / "dut_results"
-            local_result_dir.mkdir(parents=True, exist_ok=True)
-            for fname in ['energy.csv', 'result.csv']:
-                scp_cmd = ['scp', f'{context.laptop_user}@{context.laptop_host}:{remote_result_dir}/{fname}', str(local_result_dir / fname)]
-                result = subprocess.run(scp_cmd, capture_output=True)
-                if result.returncode == 0:
-                    output.console_log(f"  ✓ Retrieved {fname}")
-                else:
-                    output.console_log(f"  ✗ Failed to retrieve {fname}")
+    def stop_measurement(self, context: 'RunnerContext') -> None:
+        self._log_line("Stopping measurement and retrieving results...")
+        if context.ssh_returncode == 0 and context.dut_result_line is None:
+            self._fetch_results(context)
 
-    def stop_run(self, context: RunnerContext) -> None:
-        output.console_log("")
-        output.console_log(f"Run #{context.run_nr} complete (Batch {self.current_batch})")
-        output.console_log("─" * 50)
+    def stop_run(self, context: 'RunnerContext') -> None:
+        self._log_line("")
+        self._log_line(f"Run #{context.run_nr} complete (Batch {self.current_batch})")
+        self._log_line("─" * 50)
 
-    def populate_run_data(self, context: RunnerContext) -> Optional[Dict[str, Any]]:
-        output.console_log("Parsing run data...")
+    def populate_run_data(self, context: 'RunnerContext') -> Optional[Dict[str, Any]]:
+        self._log_line("Parsing run data...")
         run_data = {'energy_j': None, 'runtime_s': None, 'status': 'FAILED', 'batch_num': self.current_batch}
         result_file = context.run_dir / "dut_results" / "result.csv"
-        if result_file.exists():
+        result_line = None
+        if context.dut_result_line is not None:
+            result_line = context.dut_result_line.encode()
+        elif result_file.is_file():
+            result_line = result_file.read_bytes()
+        if result_line is not None:
             try:
-                with open(result_file, 'r') as f:
-                    result_line = f.read().strip()
-                parts = result_line.split(',')
+                parts = result_line.rstrip().split(b',', 9)
                 if len(parts) >= 9:
-                    run_data['runtime_s'] = float(parts[6]) if parts[6] != 'FAILED' else None
-                    run_data['energy_j'] = float(parts[7]) if parts[7] != 'FAILED' else None
-                    run_data['status'] = parts[8]
-                    output.console_log(f"  Runtime: {run_data['runtime_s']}s")
-                    output.console_log(f"  Energy:  {run_data['energy_j']}J")
-                    output.console_log(f"  Status:  {run_data['status']}")
-                    output.console_log(f"  Batch:   {run_data['batch_num']}")
+                    run_data['runtime_s'] = float(parts[6]) if parts[6] != b'FAILED' else None
+                    run_data['energy_j'] = float(parts[7]) if parts[7] != b'FAILED' else None
+                    run_data['status'] = parts[8].decode()
+                    self._log_line(f"  Runtime: {run_data['runtime_s']}s")
+                    self._log_line(f"  Energy:  {run_data['energy_j']}J")
+                    self._log_line(f"  Status:  {run_data['status']}")
+                    self._log_line(f"  Batch:   {run_data['batch_num']}")
                 else:
-                    output.console_log("  ✗ Invalid result format")
+                    self._log_line("  ✗ Invalid result format")
             except Exception as e:
-                output.console_log(f"  ✗ Error parsing results: {e}")
+                self._log_line(f"  ✗ Error parsing results: {e}")
         else:
-            output.console_log("  ✗ Result file not found")
+            self._log_line("  ✗ Result not reported by DUT")
+        self._flush_log()
         return run_data
 
     def after_experiment(self) -> None:
@@ -238,6 +264,8 @@ class RunnerConfig:
         output.console_log("EXPERIMENT COMPLETED")
         output.console_log("="*60)
         output.console_log(f"Total batches executed: {self.current_batch}")
+        # Earlier batches were fetched at their review; only the last batch's traces remain
+        self._fetch_energy_traces((self.current_batch - 1) * self.BATCH_SIZE + 1, self._total_runs)
         output.console_log(f"Results saved to: {self.results_output_path}")
         output.console_log("")
         output.console_log("Next steps:")
@@ -246,5 +274,95 @@ class RunnerConfig:
         output.console_log("  3. Begin statistical analysis in R")
         output.console_log("")
 
+        # Tear down the persistent SSH connection
+        subprocess.run(
+            ['ssh', '-O', 'exit', '-o', f'ControlPath={self.ssh_ctrl_path}', self.ssh_target],
+            capture_output=True
+        )
+
+    def _wait_for_review(self) -> str:
+        """Pause for up to REVIEW_TIMEOUT_S seconds, or until SIGUSR1 arrives. Returns the resume reason."""
+        if self.REVIEW_TIMEOUT_S <= 0:
+            return "review window disabled"
+        reason = ["review timeout"]
+
+        def on_resume(signum, frame):
+            reason[0] = "operator signal"
+
+        prev_usr1 = signal.signal(signal.SIGUSR1, on_resume)
+        prev_alrm = signal.signal(signal.SIGALRM, lambda signum, frame: None)
+        signal.alarm(self.REVIEW_TIMEOUT_S)
+        try:
+            signal.pause()
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGUSR1, prev_usr1)
+            signal.signal(signal.SIGALRM, prev_alrm)
+        return reason[0]
+
+    @staticmethod
+    def _find_result_line(stdout: str) -> Optional[str]:
+        """Return the result.csv line the DUT script echoed after '##RESULT## ', if any."""
+        for line in stdout.splitlines():
+            if line.startswith('##RESULT## '):
+                return line[len('##RESULT## '):]
+        return None
+
+    def _log_line(self, txt: str) -> None:
+        """Buffer a per-run log line until the next `_flush_log`."""
+        self._log.write(txt + '\n')
+
+    def _flush_log(self) -> None:
+        """Write the buffered per-run log lines to the console in one call."""
+        if self._log.tell():
+            output.console_log(self._log.getvalue().rstrip('\n'))
+            self._log = io.StringIO()
+
+    def _fetch_results(self, context: 'RunnerContext') -> None:
+        """Copy result.csv for this run from the DUT; energy traces come in bulk via `_fetch_energy_traces`."""
+        remote_result_dir = f"{self.env.exp_dir}/results/run_{context.run_nr}"
+        local_result_dir = context.run_dir / "dut_results"
+        local_result_dir.mkdir(parents=True, exist_ok=True)
+        result = self._scp_fetch(self.ssh_target, [f'{remote_result_dir}/result.csv'], local_result_dir)
+        if (local_result_dir / 'result.csv').exists():
+            self._log_line("  ✓ Retrieved result.csv")
+        else:
+            self._log_line("  ✗ Failed to retrieve result.csv")
+            self._log_line(f"  stderr: {result.stderr.decode(errors='replace')[:500]}")
+
+    def _fetch_energy_traces(self, first_run: int, last_run: int) -> None:
+        """Stream the energy.csv files of runs `first_run`..`last_run` from the DUT as one tar
+        archive into `<results_output_path>/<name>/dut_results/run_<n>/energy.csv`."""
+        stage_dir = self.results_output_path / self.name / 'dut_results'
+        stage_dir.mkdir(parents=True, exist_ok=True)
+        output.console_log("Retrieving energy traces from DUT...")
+        # Only the requested run numbers; earlier batches and other run_* dirs on the DUT are left alone
+        remote_tar = (f"cd {self.env.exp_dir}/results && "
+                      f"for n in $(seq {first_run} {last_run}); do "
+                      f"[ -f run_$n/energy.csv ] && echo run_$n/energy.csv; done | tar -cf - -T -")
+        ssh = subprocess.Popen(self._ssh_base + [self.ssh_target, remote_tar],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        untar = subprocess.run(['tar', '-xf', '-', '-C', str(stage_dir)], stdin=ssh.stdout,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        ssh.stdout.close()
+        ssh.wait()
+        if ssh.returncode == 0 and untar.returncode == 0:
+            output.console_log(f"  ✓ Energy traces saved to: {stage_dir}")
+        else:
+            output.console_log("  ✗ Failed to retrieve energy traces")
+
+    def _ssh_run(self, target: str, remote_cmd: str, **kwargs) -> subprocess.CompletedProcess:
+        """Run a command on the DUT over the shared SSH connection."""
+        return subprocess.run(self._ssh_base + [target, remote_cmd], **kwargs)
+
+    def _scp_fetch(self, target: str, remote_paths: List[str], local_dir: Path) -> subprocess.CompletedProcess:
+        """Copy files from the DUT into `local_dir` with a single scp over the shared SSH connection."""
+        sources = [f'{target}:{path}' for path in remote_paths]
+        try:
+            return subprocess.run(self._scp_base + sources + [str(local_dir)], stdin=subprocess.DEVNULL,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=60)
+        except subprocess.TimeoutExpired as e:
+            return subprocess.CompletedProcess(e.cmd, -1, None, b'scp timed out')
+
     # ================================ DO NOT ALTER BELOW THIS LINE ================================
     experiment_path: Path = None
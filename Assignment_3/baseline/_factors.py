@@ -0,0 +1,15 @@
+"""Factor levels shared by the Assignment 3 run configs."""
+
+SUBJECTS = (
+    'DaCapo',
+    'CLBG-BinaryTrees',
+    'CLBG-Fannkuch',
+    'CLBG-NBody',
+    'Rosetta',
+    'PetClinic',
+    'TodoApp',
+    'ANDIE',
+)
+GCS = ('Serial', 'Parallel', 'G1')
+WORKLOADS = ('Light', 'Medium', 'Heavy')
+JDKS = ('openjdk', 'oracle')
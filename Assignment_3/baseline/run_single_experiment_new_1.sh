@@ -351,6 +351,7 @@ if sudo timeout --preserve-status -k 10s $MAX_TIME \
     # Write result line
     echo "$RUN_NUM,$SUBJECT,$GC,$WORKLOAD,$JDK,$REP,$RUNTIME,$ENERGY,SUCCESS,$(date '+%Y-%m-%d %H:%M:%S')" \
         > "$RESULTS_DIR/result.csv"
+    echo "##RESULT## $(cat "$RESULTS_DIR/result.csv")"
     
     # Cooldown before next run
     wait_for_cooldown
@@ -375,6 +376,7 @@ else
 
     echo "$RUN_NUM,$SUBJECT,$GC,$WORKLOAD,$JDK,$REP,FAILED,FAILED,$STATUS,$(date '+%Y-%m-%d %H:%M:%S')" \
         > "$RESULTS_DIR/result.csv"
+    echo "##RESULT## $(cat "$RESULTS_DIR/result.csv")"
 
     # Still cooldown even after failure/timeout
     wait_for_cooldown
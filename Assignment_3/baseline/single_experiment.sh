@@ -198,6 +198,7 @@ if energibridge --summary --output "$ENERGY_FILE" \
         # Write result line
         echo "$RUN_NUM,$SUBJECT,$GC,$WORKLOAD,$JDK,$REP,$RUNTIME,$ENERGY,SUCCESS,$(date '+%Y-%m-%d %H:%M:%S')" \
             > "$RESULTS_DIR/result.csv"
+        echo "##RESULT## $(cat "$RESULTS_DIR/result.csv")"
     fi
     
     # Cooldown before next run
@@ -210,6 +211,7 @@ else
     
     echo "$RUN_NUM,$SUBJECT,$GC,$WORKLOAD,$JDK,$REP,FAILED,FAILED,FAILED,$(date '+%Y-%m-%d %H:%M:%S')" \
         > "$RESULTS_DIR/result.csv"
+    echo "##RESULT## $(cat "$RESULTS_DIR/result.csv")"
     
     exit 1
 fi
\ No newline at end of file
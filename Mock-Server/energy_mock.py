@@ -4,18 +4,40 @@ Basic mock energy measurement interface for development on non-Linux systems.
 Simulates RAPL behavior by running actual commands and generating realistic energy data.
 """
 
+import asyncio
 import subprocess
 import time
-import csv
-import random
 import os
-from typing import List
+from typing import List, Tuple
+
+import numpy as np
 
 
 class MockEnergyMeasurement:
+    # Power multipliers by workload argument (light is the baseline)
+    WORKLOAD_MULTIPLIERS = {'light': 1.0, 'medium': 1.8, 'heavy': 2.5}
+
+    # Power multipliers by GC flag: Serial is typically more energy efficient on a single core,
+    # Parallel is the baseline reference, G1 has slight overhead for concurrent operations
+    GC_MULTIPLIERS = {'-XX:+UseSerialGC': 0.85, '-XX:+UseParallelGC': 1.0, '-XX:+UseG1GC': 1.12}
+    DEFAULT_GC_MULTIPLIER = 0.95  # Default JVM GC (usually G1 in modern JVMs)
+
+    NOISE_BATCH = 256  # Standard normals drawn per refill
+
+    CSV_HEADER = b"timestamp,energy_joules,power_watts,execution_time\r\n"
+
     def __init__(self, seed=42):
         """Initialize mock with fixed seed for reproducible results during development."""
-        random.seed(seed)
+        self._noise = np.empty(self.NOISE_BATCH)
+        self.reseed(seed)
+        # Keep the command's stdout/stderr only when debugging (ENERGY_MOCK_DEBUG=true)
+        self.capture = os.getenv('ENERGY_MOCK_DEBUG', 'false').lower() == 'true'
+        
+    def reseed(self, seed) -> None:
+        """Restart the noise sequence from seed, refilling the existing noise buffer in place."""
+        self._rng = np.random.default_rng(seed)
+        self._rng.standard_normal(out=self._noise)
+        self._noise_idx = 0
         
     def measure_command(self, command: List[str], output_file: str) -> int:
         """
@@ -25,11 +47,23 @@ class MockEnergyMeasurement:
         print(f"MOCK MODE: Executing {' '.join(command)}")
         
         # Run actual command to get real execution time and behavior
-        start_time = time.time()
+        start_ns = time.monotonic_ns()  # Monotonic: unaffected by wall-clock (NTP) adjustments
         try:
-            result = subprocess.run(command, capture_output=True, text=True, timeout=300)
-            execution_time = time.time() - start_time
-            exit_code = result.returncode
+            if self.capture:
+                result = subprocess.run(command, capture_output=True, text=True, timeout=300)
+                exit_code = result.returncode
+                if exit_code != 0:
+                    print(f"MOCK DEBUG: stderr: {result.stderr[-500:]}")
+            else:
+                # Nothing to capture: a bare Popen/wait skips subprocess.run's communicate() plumbing
+                proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                try:
+                    exit_code = proc.wait(timeout=300)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait()
+                    raise
+            execution_time = (time.monotonic_ns() - start_ns) * 1e-9
         except subprocess.TimeoutExpired:
             execution_time = 300.0  # Timeout case
             exit_code = 1
@@ -38,92 +72,136 @@ class MockEnergyMeasurement:
             execution_time = 0.1
             exit_code = 1
             
-        # Generate realistic energy consumption
-        energy_joules = self._simulate_energy(command, execution_time)
-        
-        # Write EnergiBridge-compatible CSV
-        self._write_energibridge_csv(output_file, energy_joules, execution_time)
+        energy_joules = self.record_measurement(command, execution_time, output_file)
         
         print(f"MOCK: Executed in {execution_time:.2f}s, Energy: {energy_joules:.2f}J")
         return exit_code
     
+    def measure_batch(self, jobs: List[Tuple[List[str], str]]) -> List[int]:
+        """
+        Execute (command, output_file) pairs concurrently and generate mock measurements.
+        Returns exit codes in the same order as jobs.
+        
+        The commands compete for the same cores, so each one's wall time (and hence its
+        simulated energy) is inflated by the others. Results are not comparable with serial
+        measure_command runs or across batches of different sizes; use measure_command
+        wherever energies are compared.
+        """
+        timings = asyncio.run(self._run_batch([command for command, _ in jobs]))
+        
+        # Energy is simulated in job order so seeded noise stays reproducible
+        exit_codes = []
+        for (command, output_file), (exit_code, execution_time) in zip(jobs, timings):
+            energy_joules = self.record_measurement(command, execution_time, output_file)
+            print(f"MOCK: {' '.join(command)} executed in {execution_time:.2f}s, Energy: {energy_joules:.2f}J")
+            exit_codes.append(exit_code)
+        return exit_codes
+    
+    def record_measurement(self, command: List[str], execution_time: float, output_file: str) -> float:
+        """
+        Generate the mock measurement for a command that already ran for execution_time seconds.
+        Writes the EnergiBridge-compatible CSV and returns the simulated energy in joules.
+        """
+        energy_joules = self._simulate_energy(command, execution_time)
+        self._write_energibridge_csv(output_file, energy_joules, execution_time)
+        return energy_joules
+    
+    async def _run_batch(self, commands: List[List[str]]) -> List[Tuple[int, float]]:
+        return await asyncio.gather(*(self.measure_command_async(command) for command in commands))
+    
+    async def measure_command_async(self, command: List[str]) -> Tuple[int, float]:
+        """Run command as an asyncio subprocess. Returns (exit_code, execution_time)."""
+        print(f"MOCK MODE: Executing {' '.join(command)}")
+        
+        start_ns = time.monotonic_ns()
+        pipe = subprocess.PIPE if self.capture else subprocess.DEVNULL
+        try:
+            proc = await asyncio.create_subprocess_exec(*command, stdout=pipe, stderr=pipe)
+            try:
+                _, stderr = await asyncio.wait_for(proc.communicate(), timeout=300)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                return 1, 300.0  # Timeout case
+            execution_time = (time.monotonic_ns() - start_ns) * 1e-9
+            exit_code = proc.returncode
+            if self.capture and exit_code != 0:
+                print(f"MOCK DEBUG: stderr: {stderr.decode(errors='replace')[-500:]}")
+        except Exception as e:
+            print(f"Command execution failed: {e}")
+            execution_time = 0.1
+            exit_code = 1
+        return exit_code, execution_time
+    
     def _simulate_energy(self, command: List[str], execution_time: float) -> float:
         """Generate realistic energy values based on command and execution time."""
         
-        # Base power consumption for M1 MacBook
-        base_power_watts = 8.0
+        # Classify the command in one pass: Java or not, workload, GC strategy
+        is_java = False
+        workload_multiplier = None
+        gc_multiplier = None
+        for arg in command:
+            if workload_multiplier is None and arg in self.WORKLOAD_MULTIPLIERS:
+                workload_multiplier = self.WORKLOAD_MULTIPLIERS[arg]
+            elif gc_multiplier is None and arg.startswith('-XX:+Use'):
+                gc_multiplier = self.GC_MULTIPLIERS.get(arg)
+            elif not is_java and 'java' in arg:
+                is_java = True
         
+        # Base power consumption for M1 MacBook;
         # Java applications typically increase power consumption
-        if any('java' in arg for arg in command):
-            base_power_watts = 12.0
-            
-        # Workload-specific adjustments (add this)
-        workload_multiplier = self._get_workload_multiplier(command)
+        base_power_watts = 12.0 if is_java else 8.0
         
-        # GC-specific power adjustments
-        gc_multiplier = self._get_gc_power_multiplier(command)
+        # Workload- and GC-specific power adjustments
+        if workload_multiplier is None:
+            workload_multiplier = 1.0
+        if gc_multiplier is None:
+            gc_multiplier = self.DEFAULT_GC_MULTIPLIER
         
         # Add some variance but ensure workload ordering
-        workload_factor = random.gauss(1.0, 0.05)  # Reduced variance
+        workload_factor = 1.0 + 0.05 * self._next_normal()  # Reduced variance
         
         # Calculate energy: Power × Time × Workload × GC
         power_watts = base_power_watts * workload_multiplier * gc_multiplier * workload_factor
         energy_joules = power_watts * execution_time
         
         # Add measurement noise
-        noise = random.gauss(0, 0.5)
+        noise = 0.5 * self._next_normal()
         return max(0.1, energy_joules + noise)
 
-    def _get_workload_multiplier(self, command: List[str]) -> float:
-        """Return power multiplier based on workload intensity."""
-        command_str = ' '.join(command)
-        
-        if 'light' in command_str:
-            return 1.0   # Baseline
-        elif 'medium' in command_str:
-            return 1.8   # More computation
-        elif 'heavy' in command_str:
-            return 2.5   # Intensive computation
-        else:
-            return 1.0
+    def _next_normal(self) -> float:
+        """Return the next standard normal sample, refilling the batch when exhausted."""
+        if self._noise_idx == self.NOISE_BATCH:
+            self._rng.standard_normal(out=self._noise)
+            self._noise_idx = 0
+        value = self._noise[self._noise_idx]
+        self._noise_idx += 1
+        return float(value)
 
-    def _get_gc_power_multiplier(self, command: List[str]) -> float:
-        """Return power multiplier based on GC strategy."""
-        command_str = ' '.join(command)
-        
-        if '-XX:+UseSerialGC' in command_str:
-            return 0.85  # Serial GC typically more energy efficient on single core
-        elif '-XX:+UseParallelGC' in command_str:
-            return 1.0   # Baseline reference
-        elif '-XX:+UseG1GC' in command_str:
-            return 1.12  # G1 has slight overhead for concurrent operations
-        else:
-            return 0.95  # Default JVM GC (usually G1 in modern JVMs)
-    
     def _write_energibridge_csv(self, output_file: str, energy: float, execution_time: float):
         """Write CSV file in EnergiBridge format."""
         
         # Calculate derived metrics
         power_watts = energy / execution_time if execution_time > 0 else 0
         
-        # EnergiBridge CSV structure (simplified but compatible)
-        with open(output_file, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            
-            # Header
-            writer.writerow(['timestamp', 'energy_joules', 'power_watts', 'execution_time'])
-            
-            # Single measurement row (EnergiBridge aggregates to summary)
-            timestamp = int(time.time())
-            writer.writerow([timestamp, f"{energy:.6f}", f"{power_watts:.6f}", f"{execution_time:.6f}"])
+        # EnergiBridge CSV structure (simplified but compatible): header plus a single
+        # measurement row (EnergiBridge aggregates to summary), formatted straight to bytes
+        # and written in one os.write. Rows end in '\r\n' like csv.writer's default dialect.
+        timestamp = int(time.time())
+        payload = self.CSV_HEADER + b"%d,%.6f,%.6f,%.6f\r\n" % (timestamp, energy, power_watts, execution_time)
+        fd = os.open(output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, payload)
+        finally:
+            os.close(fd)
     
     def parse_energy_result(self, csv_file: str) -> float:
         """Extract energy value from mock CSV (for compatibility with analysis code)."""
         try:
-            with open(csv_file, 'r') as f:
-                reader = csv.DictReader(f)
-                row = next(reader)
-                return float(row['energy_joules'])
+            # Fixed layout written by _write_energibridge_csv: header, then one data row
+            with open(csv_file, 'rb') as f:
+                f.readline()  # header
+                return float(f.readline().split(b',', 2)[1])
         except Exception as e:
             print(f"Error parsing energy result: {e}")
             return 0.0
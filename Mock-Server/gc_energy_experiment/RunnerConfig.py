@@ -12,14 +12,20 @@ from ConfigValidator.Config.Models.RunnerContext import RunnerContext
 from ConfigValidator.Config.Models.OperationType import OperationType
 from ProgressManager.Output.OutputProcedure import OutputProcedure as output
 
-from typing import Dict, Any, Optional
+from typing import Dict, List, Any, Optional
 from pathlib import Path
 from os.path import dirname, realpath
 import os
 import time
-import random
 import subprocess
 
+import numpy as np
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+
+from energy_measurement.mock_energy_core import simulate_all
+
 class RunnerConfig:
     ROOT_DIR = Path(dirname(realpath(__file__)))
 
@@ -29,6 +35,14 @@ class RunnerConfig:
     operation_type: OperationType = OperationType.AUTO
     time_between_runs_in_ms: int = 1000
 
+    # Mock measurement model: per-GC base energy (J), time (s) and relative variance
+    MOCK_GC_BASE = {
+        'SerialGC': (3.2, 0.35, 0.15),
+        'ParallelGC': (4.1, 0.22, 0.25),
+        'G1GC': (3.8, 0.28, 0.35)
+    }
+    MOCK_WORKLOAD_MULTIPLIER = {'light': 1.0, 'medium': 2.3, 'heavy': 3.5}
+
     def __init__(self):
         EventSubscriptionController.subscribe_to_multiple_events([
             (RunnerEvents.BEFORE_EXPERIMENT, self.before_experiment),
@@ -45,6 +59,12 @@ class RunnerConfig:
         self.run_table_model = None
         self.current_run_data = {}
         self.mock_enabled = True  # toggle later for real EnergiBridge
+        self.mock_measurements = {}  # __run_id -> (energy_joules, execution_time, power_watts)
+        self._run_plan = {}  # __run_id -> java command, built in before_experiment
+        # Mock runs only sleep for the synthetic execution time when MOCK_SLEEP=1
+        self.simulate_sleep = os.getenv('MOCK_SLEEP', '0') == '1'
+        # Per-run console output only when GC_EXP_VERBOSE=1
+        self._verbose = os.getenv('GC_EXP_VERBOSE', '0') == '1'
         output.console_log("Java GC Energy Experiment initialized")
 
         # Subject → Path mapping
@@ -61,9 +81,15 @@ class RunnerConfig:
             "openjdk17": "/Library/Java/JavaVirtualMachines/amazon-corretto-17.jdk/Contents/Home"
         }
 
+        # Pre-resolved command pieces: JVM flags must precede "-jar", so the GC flag
+        # sits between the java binary and the per-subject jar arguments
+        self._java_bin = {jdk: f"{path}/bin/java" for jdk, path in self.jdks.items()}
+        self._jar_args = {subject: ("-jar", str(path)) for subject, path in self.subjects.items()}
+        self._gc_flags = {gc: f"-XX:+Use{gc}" for gc in ['SerialGC', 'ParallelGC', 'G1GC']}
+
     def create_run_table_model(self) -> RunTableModel:
         subject = FactorModel("subject", list(self.subjects.keys()))
-        gc_strategy = FactorModel("gc_strategy", ['SerialGC', 'ParallelGC', 'G1GC'])
+        gc_strategy = FactorModel("gc_strategy", list(self._gc_flags.keys()))
         workload = FactorModel("workload", ['light', 'medium', 'heavy'])
         jdk = FactorModel("jdk", list(self.jdks.keys()))
 
@@ -77,6 +103,19 @@ class RunnerConfig:
 
     def before_experiment(self) -> None:
         output.console_log("Setting up Java GC experiment...")
+        rows = self.run_table_model.generate_experiment_run_table()
+        # __run_id -> fully built java command, so interact does no per-run assembly
+        self._run_plan = {
+            r['__run_id']: [
+                self._java_bin[r['jdk']],
+                self._gc_flags[r['gc_strategy']],
+                *self._jar_args[r['subject']],
+                f"--workload={r['workload']}"
+            ]
+            for r in rows
+        }
+        if self.mock_enabled:
+            self._precompute_mock_measurements(rows)
 
     def before_run(self) -> None:
         pass
@@ -86,36 +125,27 @@ class RunnerConfig:
             'run_id': context.run_nr,
             'run_dir': context.run_dir
         }
-        output.console_log(f"Starting run {context.run_nr}")
+        if self._verbose:
+            output.console_log(f"Starting run {context.run_nr}")
 
     def start_measurement(self, context: RunnerContext) -> None:
         pass
 
     def interact(self, context: RunnerContext) -> None:
-        # Factors are in context.execute_run dictionary
-        subject = context.execute_run['subject']
-        gc_strategy = context.execute_run['gc_strategy']
-        workload = context.execute_run['workload']
-        jdk = context.execute_run['jdk']
-        
-        output.console_log(f"Executing {subject} | {gc_strategy} | {workload} | {jdk}")
-        
-        jar_path = self.subjects[subject]
-        jdk_path = self.jdks[jdk]
+        run_id = context.execute_run['__run_id']
+        java_cmd = self._run_plan[run_id]
 
-        java_cmd = [
-            f"{jdk_path}/bin/java",
-            f"-XX:+Use{gc_strategy}",
-            "-jar", str(jar_path),
-            f"--workload={workload}"
-        ]
-
-        output.console_log(f"[Run {context.run_nr}] Command: {' '.join(java_cmd)}")
+        if self._verbose:
+            # Factors are in context.execute_run dictionary
+            run = context.execute_run
+            output.console_log(f"Executing {run['subject']} | {run['gc_strategy']} | {run['workload']} | {run['jdk']}")
+            output.console_log(f"[Run {context.run_nr}] Command: {' '.join(java_cmd)}")
 
         if self.mock_enabled:
-            energy_joules, execution_time, power_watts = self._mock_energy_measurement(gc_strategy, workload, jdk)
+            energy_joules, execution_time, power_watts = self.mock_measurements[run_id]
             exit_code = 0
-            time.sleep(min(execution_time, 0.2))
+            if self.simulate_sleep:
+                time.sleep(min(execution_time, 0.2))
         else:
             energy_joules, execution_time, power_watts, exit_code = 0.0, 0.0, 0.0, 0
 
@@ -126,7 +156,8 @@ class RunnerConfig:
             'exit_code': exit_code
         })
 
-        output.console_log(f"Completed: {energy_joules:.3f}J in {execution_time:.3f}s")
+        if self._verbose:
+            output.console_log(f"Completed: {energy_joules:.3f}J in {execution_time:.3f}s")
 
 
 
@@ -142,26 +173,21 @@ class RunnerConfig:
     def after_experiment(self) -> None:
         output.console_log("Java GC experiment completed")
 
-    def _mock_energy_measurement(self, gc_strategy: str, workload: str, jdk: str) -> tuple:
-        base_values = {
-            'SerialGC': {'energy': 3.2, 'time': 0.35, 'variance': 0.15},
-            'ParallelGC': {'energy': 4.1, 'time': 0.22, 'variance': 0.25},
-            'G1GC': {'energy': 3.8, 'time': 0.28, 'variance': 0.35}
-        }
-        workload_multiplier = {'light': 1.0, 'medium': 2.3, 'heavy': 3.5}.get(workload, 1.0)
-        jdk_factor = 1.05 if "oracle" in jdk else 1.0
-        base = base_values.get(gc_strategy, base_values['G1GC'])
-
-        energy_base = base['energy'] * workload_multiplier * jdk_factor
-        time_base = base['time'] * (workload_multiplier ** 0.8)
-
-        energy_joules = energy_base * random.gauss(1.0, base['variance'])
-        execution_time = time_base * random.gauss(1.0, base['variance'] * 0.8)
-        energy_joules = max(0.1, energy_joules)
-        execution_time = max(0.05, execution_time)
-        power_watts = energy_joules / execution_time
-
-        return round(energy_joules, 6), round(execution_time, 6), round(power_watts, 6)
+    def _precompute_mock_measurements(self, rows: List[Dict[str, Any]]) -> None:
+        """Draw the mock measurements for every run in the run table at once."""
+        base = np.array([self.MOCK_GC_BASE.get(r['gc_strategy'], self.MOCK_GC_BASE['G1GC']) for r in rows])
+        workload_multiplier = np.array([self.MOCK_WORKLOAD_MULTIPLIER.get(r['workload'], 1.0) for r in rows])
+        jdk_factor = np.array([1.05 if "oracle" in r['jdk'] else 1.0 for r in rows])
+        energy, exec_time, variance = base[:, 0], base[:, 1], base[:, 2]
+
+        energy_base = energy * workload_multiplier * jdk_factor
+        time_base = exec_time * workload_multiplier ** 0.8
+
+        measurements = simulate_all(energy_base, time_base, variance).round(6)
+        self.mock_measurements = dict(zip(
+            (r['__run_id'] for r in rows),
+            map(tuple, measurements.tolist())
+        ))
 
     # ================================ DO NOT ALTER BELOW THIS LINE ================================
     experiment_path: Path = None
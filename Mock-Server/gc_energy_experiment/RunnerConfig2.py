@@ -12,10 +12,11 @@ from ConfigValidator.Config.Models.RunnerContext import RunnerContext
 from ConfigValidator.Config.Models.OperationType import OperationType
 from ProgressManager.Output.OutputProcedure import OutputProcedure as output
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 from os.path import dirname, realpath
 import os
+import subprocess
 
 # Add current directory to Python path for energy_measurement module
 import sys
@@ -44,6 +45,18 @@ class RunnerConfig:
     This can be essential to accommodate for cooldown periods on some systems."""
     time_between_runs_in_ms: int = 2000  # 2 second cooldown for energy measurement
 
+    # Factor levels; the GC strategies map to their JVM flags
+    GC_FLAGS = {
+        'SerialGC': '-XX:+UseSerialGC',
+        'ParallelGC': '-XX:+UseParallelGC',
+        'G1GC': '-XX:+UseG1GC'
+    }
+    WORKLOADS = ['light', 'medium']  # Start small for testing
+
+    # GC strategy and workload every run executes with (the run table factors are not wired in yet)
+    RUN_GC_STRATEGY = 'G1GC'
+    RUN_WORKLOAD = 'light'
+
     def __init__(self):
         """Executes immediately after program start, on config load"""
 
@@ -62,11 +75,23 @@ class RunnerConfig:
         self.run_table_model = None
         
         # Initialize energy measurement wrapper
-        self.energy_wrapper = GCEnergyWrapper()
+        self.energy_wrapper = GCEnergyWrapper(cache_dir=self.ROOT_DIR / '.cache')
         
         # Store current run info for energy measurement
         self.current_run_info = None
-        self.current_energy_file = None
+        self._mock_results = []  # Simulated results per run (mock mode), filled in before_experiment
+        # Per-run console output only when GC_EXP_VERBOSE=1
+        self._verbose = os.getenv('GC_EXP_VERBOSE', '0') == '1'
+        
+        # Java command per (gc_strategy, workload), built once; tuples so they cannot be mutated
+        self._command_cache = {
+            (gc, wl): ('java', flag, '-cp', '.', 'SimpleGCTest', wl)  # Classpath: the subjects directory
+            for gc, flag in self.GC_FLAGS.items() for wl in self.WORKLOADS
+        }
+        
+        # Every run executes the same command, so it is built and joined for logging once
+        self._java_command = self._build_java_command(self.RUN_GC_STRATEGY, self.RUN_WORKLOAD)
+        self._java_command_str = ' '.join(self._java_command)
 
         output.console_log("GC Energy Experiment config loaded")
         output.console_log(f"Mock mode: {os.getenv('ENERGY_MOCK_MODE', 'false')}")
@@ -75,8 +100,8 @@ class RunnerConfig:
         """Create and return the run_table model for GC energy efficiency experiment"""
         
         # Define experimental factors
-        gc_strategy = FactorModel("gc_strategy", ['SerialGC', 'ParallelGC', 'G1GC'])
-        workload = FactorModel("workload", ['light', 'medium'])  # Start small for testing
+        gc_strategy = FactorModel("gc_strategy", list(self.GC_FLAGS))
+        workload = FactorModel("workload", self.WORKLOADS)
         jdk_implementation = FactorModel("jdk_implementation", ['default'])  # Single JDK for now
         
         self.run_table_model = RunTableModel(
@@ -95,22 +120,27 @@ class RunnerConfig:
         
         output.console_log("Setting up Java GC energy efficiency experiment...")
         
-        # Validate Java installation
-        if not self._validate_java_installation():
-            raise RuntimeError("Java installation validation failed")
-        
         # Compile test subjects
         self._compile_test_subjects()
         
-        # Validate energy measurement system
+        # Validate energy measurement system (includes the cached Java check)
         if not self.energy_wrapper.validate_setup():
             raise RuntimeError("Energy measurement validation failed")
         
+        # Mock runs are simulated here, all at once; interact only looks its run up by run number
+        if self.energy_wrapper.mock_mode:
+            n_runs = len(self.run_table_model.generate_experiment_run_table())
+            self.energy_wrapper.prefill_noise(n_runs)
+            self._mock_results = [
+                self.energy_wrapper.simulate_execution(self._java_command, run_index=i) for i in range(n_runs)
+            ]
+        
         output.console_log("Pre-experiment validation completed successfully")
 
     def before_run(self) -> None:
         """Perform any activity required before starting a run"""
-        output.console_log("Preparing for next run...")
+        if self._verbose:
+            output.console_log("Preparing for next run...")
 
     def start_run(self, context: RunnerContext) -> None:
         """Perform any activity required for starting the run"""
@@ -121,81 +151,86 @@ class RunnerConfig:
             'run_dir': context.run_dir
         }
         
-        # Define energy measurement output file
-        self.current_energy_file = context.run_dir / "energy_measurement.csv"
-        
-        output.console_log(f"Starting run {context.run_nr}")
+        if self._verbose:
+            output.console_log(f"Starting run {context.run_nr}")
 
     def start_measurement(self, context: RunnerContext) -> None:
         """Perform any activity required for starting measurements"""
-        output.console_log("Starting energy measurement...")
+        if self._verbose:
+            output.console_log("Starting energy measurement...")
 
 
     def interact(self, context: RunnerContext) -> None:
         """Execute the Java application with energy measurement"""
         
-        gc_strategy = 'G1GC'
-        workload = 'light'
+        gc_strategy = self.RUN_GC_STRATEGY
+        workload = self.RUN_WORKLOAD
         
-        java_command = self._build_java_command(gc_strategy, workload)
+        java_command = self._java_command
         
-        output.console_log(f"Executing: {' '.join(java_command)}")
+        if self._verbose:
+            output.console_log(f"Executing: {self._java_command_str}")
+        
+        if self.energy_wrapper.mock_mode:
+            # Mock mode: no JVM is started, execution time and energy were simulated in before_experiment
+            self.current_run_info.update({
+                'exit_code': 0,
+                **self._mock_results[context.run_nr - 1],
+                'gc_strategy': gc_strategy,
+                'workload': workload
+            })
+            if self._verbose:
+                output.console_log("Java execution simulated (mock mode)")
+            return
         
         # Change to subjects directory for execution
         subjects_dir = self.ROOT_DIR / 'subjects'
         
         try:
-            import subprocess
-            import os
-            
-            # Execute in subjects directory
+            # Execute in subjects directory; only stderr is kept, decoded on failure
             result = subprocess.run(
                 java_command, 
                 cwd=str(subjects_dir),
-                capture_output=True, 
-                text=True
-            )
-            
-            # Use our energy wrapper to simulate the measurement
-            self.energy_wrapper._write_energy_csv(
-                str(self.current_energy_file),
-                2.5,  # Simulated energy
-                0.2   # Simulated time
+                stdout=subprocess.DEVNULL, 
+                stderr=subprocess.PIPE
             )
             
+            # Simulated measurement is kept in memory; the values reach the
+            # run table via populate_run_data, so no per-run energy CSV is written
             self.current_run_info.update({
                 'exit_code': result.returncode,
-                'energy_file': str(self.current_energy_file),
+                'energy_joules': 2.5,  # Simulated energy
+                'execution_time': 0.0,  # Not measured on this path; the run table has always recorded 0.0
                 'gc_strategy': gc_strategy,
                 'workload': workload
             })
             
-            if result.returncode == 0:
+            if result.returncode != 0:
+                output.console_log(f"Java execution failed: {result.stderr.decode(errors='replace')}")
+            elif self._verbose:
                 output.console_log("Java execution completed successfully")
-            else:
-                output.console_log(f"Java execution failed: {result.stderr}")
                 
         except Exception as e:
             output.console_log(f"ERROR during Java execution: {e}")
 
     def stop_measurement(self, context: RunnerContext) -> None:
         """Perform any activity here required for stopping measurements"""
-        output.console_log("Stopping energy measurement...")
+        if self._verbose:
+            output.console_log("Stopping energy measurement...")
 
     def stop_run(self, context: RunnerContext) -> None:
         """Perform any activity here required for stopping the run"""
-        output.console_log(f"Run {context.run_nr} completed")
+        if self._verbose:
+            output.console_log(f"Run {context.run_nr} completed")
 
     def populate_run_data(self, context: RunnerContext) -> Optional[Dict[str, Any]]:
         """Parse and process energy measurement data"""
         
         try:
-            # Parse energy results
+            # Collect energy results
             if self.current_run_info['exit_code'] == 0:
-                energy_joules = self.energy_wrapper.parse_energy_result(self.current_run_info['energy_file'])
-                
-                # Calculate execution time from energy file if available
-                execution_time = 0.0  # Could extract from energy CSV if needed
+                energy_joules = self.current_run_info['energy_joules']
+                execution_time = self.current_run_info['execution_time']
                 
                 run_data = {
                     'energy_joules': energy_joules,
@@ -203,7 +238,8 @@ class RunnerConfig:
                     'exit_code': self.current_run_info['exit_code']
                 }
                 
-                output.console_log(f"Energy consumed: {energy_joules:.2f} joules")
+                if self._verbose:
+                    output.console_log(f"Energy consumed: {energy_joules:.2f} joules")
                 
             else:
                 # Failed run
@@ -232,60 +268,31 @@ class RunnerConfig:
         output.console_log("Java GC energy efficiency experiment completed")
         self._summarize_results()
 
-    def _validate_java_installation(self) -> bool:
-        """Validate that Java is properly installed and accessible"""
-        try:
-            import subprocess
-            result = subprocess.run(['java', '-version'], capture_output=True, text=True)
-            if result.returncode == 0:
-                output.console_log("Java validation successful")
-                return True
-            else:
-                output.console_log(f"Java validation failed: {result.stderr}")
-                return False
-        except Exception as e:
-            output.console_log(f"Java validation error: {e}")
-            return False
-
     def _compile_test_subjects(self) -> None:
         """Compile Java test applications if needed"""
         subjects_dir = self.ROOT_DIR / "subjects"
         java_files = list(subjects_dir.glob("*.java"))
         
-        if java_files:
-            output.console_log(f"Compiling {len(java_files)} Java source files...")
-            import subprocess
-            
-            for java_file in java_files:
-                try:
-                    result = subprocess.run(['javac', str(java_file)], 
-                                          capture_output=True, text=True, cwd=subjects_dir)
-                    if result.returncode != 0:
-                        output.console_log(f"Warning: Failed to compile {java_file}: {result.stderr}")
-                except Exception as e:
-                    output.console_log(f"Error compiling {java_file}: {e}")
-
-    def _build_java_command(self, gc_strategy: str, workload: str) -> List[str]:
-        """Build Java command with appropriate GC flags"""
+        # Only sources whose .class file is missing or older need compiling
+        stale = [f for f in java_files
+                 if not f.with_suffix('.class').exists()
+                 or f.with_suffix('.class').stat().st_mtime < f.stat().st_mtime]
         
-        gc_flags = {
-            'SerialGC': '-XX:+UseSerialGC',
-            'ParallelGC': '-XX:+UseParallelGC', 
-            'G1GC': '-XX:+UseG1GC'
-        }
-        
-        # Execute from the subjects directory
-        subjects_dir = str(self.ROOT_DIR / 'subjects')
-        
-        command = [
-            'java',
-            gc_flags[gc_strategy],
-            '-cp', '.',  # Use current directory as classpath
-            'SimpleGCTest',
-            workload
-        ]
-        
-        return command
+        if stale:
+            output.console_log(f"Compiling {len(stale)} Java source files...")
+            
+            # One javac call for all files: pays JVM startup once
+            try:
+                result = subprocess.run(['javac'] + [str(f) for f in stale], 
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, cwd=subjects_dir)
+                if result.returncode != 0:
+                    output.console_log(f"Warning: Failed to compile Java sources: {result.stderr.decode(errors='replace')}")
+            except Exception as e:
+                output.console_log(f"Error compiling Java sources: {e}")
+
+    def _build_java_command(self, gc_strategy: str, workload: str) -> Tuple[str, ...]:
+        """Return the Java command with appropriate GC flags (prebuilt in __init__)"""
+        return self._command_cache[(gc_strategy, workload)]
 
 
     def _summarize_results(self) -> None:
@@ -293,11 +300,25 @@ class RunnerConfig:
         experiments_dir = self.results_output_path / self.name
         
         if experiments_dir.exists():
-            csv_files = list(experiments_dir.rglob("*.csv"))
-            output.console_log(f"Experiment generated {len(csv_files)} result files")
+            n_csv_files = self._count_csv_files(experiments_dir)
+            output.console_log(f"Experiment generated {n_csv_files} result files")
             output.console_log(f"Results stored in: {experiments_dir}")
         else:
             output.console_log("No results directory found")
 
+    @staticmethod
+    def _count_csv_files(root: Path) -> int:
+        """Count *.csv files below `root` with an os.scandir walk; no Path is built per entry"""
+        count = 0
+        stack = [root]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith('.csv'):
+                        count += 1
+        return count
+
     # ================================ DO NOT ALTER BELOW THIS LINE ================================
     experiment_path: Path = None
\ No newline at end of file
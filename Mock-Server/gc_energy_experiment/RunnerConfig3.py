@@ -19,7 +19,13 @@ import os
 import subprocess
 import time
 import csv
-import random
+
+import numpy as np
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+
+from energy_measurement.mock_energy_core import simulate_all
 
 class RunnerConfig:
     ROOT_DIR = Path(dirname(realpath(__file__)))
@@ -30,6 +36,16 @@ class RunnerConfig:
     operation_type: OperationType = OperationType.AUTO
     time_between_runs_in_ms: int = 1000
 
+    # Simple mapping based on run number since we can't access factors directly
+    RUN_CONFIGS = [
+        ('SerialGC', 'light'),
+        ('SerialGC', 'medium'),
+        ('ParallelGC', 'light'),
+        ('ParallelGC', 'medium'),
+        ('G1GC', 'light'),
+        ('G1GC', 'medium')
+    ]
+
     def __init__(self):
         """Executes immediately after program start, on config load"""
         EventSubscriptionController.subscribe_to_multiple_events([
@@ -47,6 +63,17 @@ class RunnerConfig:
         self.run_table_model = None
         self.current_run_data = {}
         self.mock_enabled = os.getenv('ENERGY_MOCK_MODE', 'false').lower() == 'true'
+        self.mock_measurements = {}  # run_nr -> (energy_joules, execution_time, power_watts)
+        # Mock runs only sleep for the synthetic execution time when MOCK_SLEEP=1
+        self.simulate_sleep = os.getenv('MOCK_SLEEP', '0') == '1'
+        # Per-run console output only when GC_EXP_VERBOSE=1
+        self._verbose = os.getenv('GC_EXP_VERBOSE', '0') == '1'
+
+        # Workload-scaled mock base values per (gc_strategy, workload), computed once
+        self._mock_base_lut = {
+            (gc, wl): self._mock_base(gc, wl)
+            for gc in ['SerialGC', 'ParallelGC', 'G1GC'] for wl in ['light', 'medium']
+        }
         
         output.console_log("Java GC Energy Experiment initialized")
 
@@ -67,6 +94,8 @@ class RunnerConfig:
         """Called before the experiment starts"""
         output.console_log("Setting up Java GC experiment...")
         self._setup_java_test()
+        if self.mock_enabled:
+            self._precompute_mock_measurements()
 
     def before_run(self) -> None:
         """Called before each run"""
@@ -78,7 +107,8 @@ class RunnerConfig:
             'run_id': context.run_nr,
             'run_dir': context.run_dir
         }
-        output.console_log(f"Starting run {context.run_nr}")
+        if self._verbose:
+            output.console_log(f"Starting run {context.run_nr}")
 
     def start_measurement(self, context: RunnerContext) -> None:
         """Called when measurements should start"""
@@ -87,33 +117,21 @@ class RunnerConfig:
     def interact(self, context: RunnerContext) -> None:
         """Main execution phase - this is where the work happens"""
 
-        output.console_log(f"Context attributes: {dir(context)}")
-        output.console_log(f"Context dict: {context.__dict__}")
-        
-            
-        # Simple mapping based on run number since we can't access factors directly
-        run_configs = [
-            ('SerialGC', 'light'),
-            ('SerialGC', 'medium'), 
-            ('ParallelGC', 'light'),
-            ('ParallelGC', 'medium'),
-            ('G1GC', 'light'),
-            ('G1GC', 'medium')
-        ]
-        
-        config_index = (context.run_nr - 1) % len(run_configs)
+        config_index = (context.run_nr - 1) % len(self.RUN_CONFIGS)
 
-        gc_strategy, workload = run_configs[config_index]
+        gc_strategy, workload = self.RUN_CONFIGS[config_index]
         
-        output.console_log(f"Executing {gc_strategy} with {workload} workload")
+        if self._verbose:
+            output.console_log(f"Executing {gc_strategy} with {workload} workload")
         
         if self.mock_enabled:
             # Mock execution with realistic patterns
-            energy_joules, execution_time, power_watts = self._mock_energy_measurement(gc_strategy, workload)
+            energy_joules, execution_time, power_watts = self.mock_measurements[context.run_nr]
             exit_code = 0
             
-            # Simulate execution time
-            time.sleep(min(execution_time, 0.2))
+            # Simulate execution time (opt-in)
+            if self.simulate_sleep:
+                time.sleep(min(execution_time, 0.2))
             
         else:
             # Real execution (placeholder for now)
@@ -132,7 +150,8 @@ class RunnerConfig:
             'workload': workload
         })
         
-        output.console_log(f"Completed: {energy_joules:.3f}J in {execution_time:.3f}s")
+        if self._verbose:
+            output.console_log(f"Completed: {energy_joules:.3f}J in {execution_time:.3f}s")
 
     def stop_measurement(self, context: RunnerContext) -> None:
         """Called when measurements should stop"""
@@ -144,11 +163,14 @@ class RunnerConfig:
 
     def populate_run_data(self, context: RunnerContext) -> Optional[Dict[str, Any]]:
         """Return data to be written to the results CSV"""
+        # interact always stores all four values, so index directly.
+        # Measurements are rounded here, where they are written to the run table.
+        d = self.current_run_data
         return {
-            'energy_joules': self.current_run_data.get('energy_joules', 0.0),
-            'execution_time': self.current_run_data.get('execution_time', 0.0),
-            'power_watts': self.current_run_data.get('power_watts', 0.0),
-            'exit_code': self.current_run_data.get('exit_code', -1)
+            'energy_joules': round(d['energy_joules'], 6),
+            'execution_time': round(d['execution_time'], 6),
+            'power_watts': round(d['power_watts'], 6),
+            'exit_code': d['exit_code']
         }
 
     def after_experiment(self) -> None:
@@ -156,8 +178,8 @@ class RunnerConfig:
         output.console_log("Java GC experiment completed")
         self._analyze_results()
 
-    def _mock_energy_measurement(self, gc_strategy: str, workload: str) -> tuple:
-        """Generate realistic mock energy measurements"""
+    def _mock_base(self, gc_strategy: str, workload: str) -> tuple:
+        """Return (energy_base, time_base, variance) for a GC/workload combination"""
         
         # Base characteristics for each GC
         base_values = {
@@ -175,16 +197,18 @@ class RunnerConfig:
         energy_base = base['energy'] * (workload_multiplier ** scaling_factor)
         time_base = base['time'] * (workload_multiplier ** (scaling_factor * 0.7))
         
-        # Add variance
-        energy_joules = energy_base * random.gauss(1.0, base['variance'])
-        execution_time = time_base * random.gauss(1.0, base['variance'] * 0.8)
-        
-        # Ensure positive values
-        energy_joules = max(0.1, energy_joules)
-        execution_time = max(0.05, execution_time)
-        power_watts = energy_joules / execution_time
-        
-        return round(energy_joules, 6), round(execution_time, 6), round(power_watts, 6)
+        return energy_base, time_base, base['variance']
+
+    def _precompute_mock_measurements(self) -> None:
+        """Draw the mock measurements for every run in the run table at once."""
+        n_runs = len(self.run_table_model.generate_experiment_run_table())
+        bases = np.array([
+            self._mock_base_lut[self.RUN_CONFIGS[i % len(self.RUN_CONFIGS)]] for i in range(n_runs)
+        ])
+        measurements = simulate_all(bases[:, 0], bases[:, 1], bases[:, 2])
+        self.mock_measurements = {
+            run_nr: tuple(m) for run_nr, m in enumerate(measurements.tolist(), start=1)
+        }
 
     def _setup_java_test(self) -> None:
         """Set up Java test application"""
@@ -227,18 +251,23 @@ public class SimpleGCTest {
         
         if results_path.exists():
             try:
+                # Single streaming pass: counts and energy sum, no row lists kept
+                total_runs = completed_runs = energy_count = 0
+                energy_sum = 0.0
                 with open(results_path, 'r') as f:
-                    reader = csv.DictReader(f)
-                    rows = list(reader)
+                    for r in csv.DictReader(f):
+                        total_runs += 1
+                        if r.get('__done') == 'DONE':
+                            completed_runs += 1
+                            if r['energy_joules']:
+                                energy_sum += float(r['energy_joules'])
+                                energy_count += 1
                 
-                completed_runs = [r for r in rows if r.get('__done') == 'DONE']
-                output.console_log(f"Completed {len(completed_runs)} runs out of {len(rows)} total")
+                output.console_log(f"Completed {completed_runs} runs out of {total_runs} total")
                 
-                if completed_runs:
-                    energies = [float(r['energy_joules']) for r in completed_runs if r['energy_joules']]
-                    if energies:
-                        avg_energy = sum(energies) / len(energies)
-                        output.console_log(f"Average energy consumption: {avg_energy:.3f}J")
+                if energy_count:
+                    avg_energy = energy_sum / energy_count
+                    output.console_log(f"Average energy consumption: {avg_energy:.3f}J")
                 
             except Exception as e:
                 output.console_log(f"Error analyzing results: {e}")
@@ -8,10 +8,12 @@ import os
 import sys
 import subprocess
 import time
-import csv
-import random
+import json
+import shutil
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
 
 
 class GCEnergyWrapper:
@@ -20,24 +22,53 @@ class GCEnergyWrapper:
     Handles both mock mode (for development) and real mode (for actual measurements).
     """
     
-    def __init__(self, mock_mode: bool = None):
+    # Power multipliers by GC flag. Based on literature: Serial often most efficient,
+    # Parallel is the baseline reference, G1 has slight overhead for concurrent operations
+    GC_MULTIPLIERS = {'-XX:+UseSerialGC': 0.85, '-XX:+UseParallelGC': 1.0, '-XX:+UseG1GC': 1.12}
+    DEFAULT_GC_MULTIPLIER = 0.95  # Default JVM GC
+    
+    # Power multipliers by workload argument (light is the baseline)
+    WORKLOAD_MULTIPLIERS = {'light': 1.0, 'medium': 1.7, 'heavy': 2.4}
+    
+    NOISE_BATCH = 256  # Rows of standard normals drawn per refill
+    
+    CSV_HEADER = b"timestamp,energy_joules,power_watts,execution_time\r\n"
+    
+    def __init__(self, mock_mode: bool = None, cache_dir: Optional[Path] = None):
         """
         Initialize energy measurement wrapper.
         
         Args:
             mock_mode: If None, determined by ENERGY_MOCK_MODE environment variable
+            cache_dir: Directory for the Java validation cache; not persisted if None
         """
         if mock_mode is None:
             mock_mode = os.getenv('ENERGY_MOCK_MODE', 'false').lower() == 'true'
         
         self.mock_mode = mock_mode
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._java_validated: Optional[bool] = None
         self.setup_random_seed()
         
         print(f"GCEnergyWrapper initialized - Mock mode: {self.mock_mode}")
     
     def setup_random_seed(self, seed: int = 42):
         """Set random seed for reproducible mock results during development."""
-        random.seed(seed)
+        # Instance-local generator: leaves the global random state untouched.
+        # Each simulation uses one row of standard normals: (time, variance, noise)
+        self._rng = np.random.default_rng(seed)
+        self._normals = np.empty((0, 3))
+        self._normals_idx = 0
+        self._run_normals = np.empty((0, 3))
+    
+    def prefill_noise(self, n_runs: int):
+        """
+        Draw the noise for `n_runs` simulations in one vectorized call.
+        
+        Rows are then selected by run index (see `simulate_execution`), so runs that
+        execute in forked processes each get their own draw instead of the same one.
+        """
+        self._run_normals = self._rng.standard_normal((n_runs, 3))
     
     def validate_setup(self) -> bool:
         """
@@ -67,6 +98,26 @@ class GCEnergyWrapper:
         else:
             return self._real_measure_command(command, output_file)
     
+    def simulate_execution(self, command: List[str], base_time: float = 0.2,
+                           run_index: Optional[int] = None) -> Dict[str, float]:
+        """
+        Simulate a run of `command` without starting it (mock mode).
+        
+        Args:
+            command: Command that would have been executed
+            base_time: Execution time (s) of the light workload
+            run_index: Row of the `prefill_noise` draw to use; next sequential draw if None
+            
+        Returns:
+            Dict with simulated 'execution_time' (s) and 'energy_joules'
+        """
+        normals = self._next_normals() if run_index is None else self._run_normals[run_index].tolist()
+        execution_time = max(0.05, base_time * self._classify_command(command)[2] * (1.0 + 0.05 * normals[0]))
+        return {
+            'execution_time': execution_time,
+            'energy_joules': self._simulate_energy(command, execution_time, normals)
+        }
+    
     def parse_energy_result(self, csv_file: str) -> float:
         """
         Extract energy value from measurement CSV file.
@@ -78,37 +129,83 @@ class GCEnergyWrapper:
             Energy consumption in joules
         """
         try:
-            with open(csv_file, 'r') as f:
-                reader = csv.DictReader(f)
-                row = next(reader)
-                return float(row['energy_joules'])
+            # Fixed layout written by _write_energy_csv: header, then one data row
+            with open(csv_file, 'rb') as f:
+                f.readline()  # header
+                return float(f.readline().split(b',', 2)[1])
+        except FileNotFoundError:
+            print(f"Energy result not found: {csv_file}")
+            return 0.0
+        except (IndexError, ValueError) as e:
+            print(f"Malformed energy result in {csv_file}: {e}")
+            return 0.0
         except Exception as e:
             print(f"Error parsing energy result from {csv_file}: {e}")
             return 0.0
     
     def _validate_mock_setup(self) -> bool:
         """Validate mock mode setup."""
+        if not self._validate_java():
+            print("Mock validation failed: Java not accessible")
+            return False
+        
+        print("Mock mode validation successful")
+        return True
+    
+    def _validate_java(self) -> bool:
+        """
+        Check that `java -version` runs, at most once per wrapper.
+        
+        A successful check is also persisted in `cache_dir`, keyed by the resolved
+        java binary and its modification time, so later experiment launches on the
+        same JDK skip the JVM start entirely.
+        """
+        if self._java_validated is not None:
+            return self._java_validated
+        
+        java_bin = shutil.which('java')
+        cache_key = None
+        cache_file = None
+        if java_bin is not None and self.cache_dir is not None:
+            java_bin = os.path.realpath(java_bin)
+            cache_key = f"{java_bin}:{os.stat(java_bin).st_mtime_ns}"
+            cache_file = self.cache_dir / 'java_validated.json'
+            try:
+                with open(cache_file, 'r') as f:
+                    if json.load(f).get('key') == cache_key:
+                        self._java_validated = True
+                        return True
+            except (OSError, ValueError):
+                pass
+        
         try:
-            # Test Java execution
             result = subprocess.run(['java', '-version'], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode != 0:
-                print("Mock validation failed: Java not accessible")
-                return False
-            
-            print("Mock mode validation successful")
-            return True
-            
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
+            self._java_validated = result.returncode == 0
         except Exception as e:
-            print(f"Mock validation error: {e}")
-            return False
+            print(f"Java validation error: {e}")
+            self._java_validated = False
+        
+        if self._java_validated and cache_file is not None:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                with open(cache_file, 'w') as f:
+                    json.dump({'key': cache_key}, f)
+            except OSError as e:
+                print(f"Could not write Java validation cache: {e}")
+        
+        return self._java_validated
     
     def _validate_real_setup(self) -> bool:
         """Validate real RAPL measurement setup."""
+        if not self._validate_java():
+            print("Real mode validation failed: Java not accessible")
+            return False
+        
         try:
             # Check if energibridge is available
             result = subprocess.run(['energibridge', '-h'], 
-                                  capture_output=True, text=True, timeout=10)
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
             if result.returncode != 0:
                 print("Real mode validation failed: EnergiBridge not accessible")
                 return False
@@ -130,15 +227,16 @@ class GCEnergyWrapper:
         print(f"MOCK: Executing {' '.join(command)}")
         
         # Run actual command to get real execution time and behavior
-        start_time = time.time()
+        start_ns = time.monotonic_ns()  # Monotonic: unaffected by wall-clock (NTP) adjustments
         try:
-            result = subprocess.run(command, capture_output=True, text=True, timeout=300)
-            execution_time = time.time() - start_time
+            # stdout is never read; stderr stays bytes and is only decoded on failure
+            result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=300)
+            execution_time = (time.monotonic_ns() - start_ns) * 1e-9
             exit_code = result.returncode
             
             if exit_code != 0:
                 print(f"MOCK: Command failed with exit code {exit_code}")
-                print(f"MOCK: stderr: {result.stderr}")
+                print(f"MOCK: stderr: {result.stderr.decode(errors='replace')}")
             
         except subprocess.TimeoutExpired:
             execution_time = 300.0
@@ -166,10 +264,10 @@ class GCEnergyWrapper:
         energibridge_cmd = ['energibridge', '--summary', '-o', output_file] + command
         
         try:
-            result = subprocess.run(energibridge_cmd, capture_output=True, text=True, timeout=300)
+            result = subprocess.run(energibridge_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=300)
             
             if result.returncode != 0:
-                print(f"REAL: EnergiBridge failed: {result.stderr}")
+                print(f"REAL: EnergiBridge failed: {result.stderr.decode(errors='replace')}")
             else:
                 print(f"REAL: Energy measurement completed")
             
@@ -182,84 +280,83 @@ class GCEnergyWrapper:
             print(f"REAL: EnergiBridge execution failed: {e}")
             return 1
     
-    def _simulate_energy(self, command: List[str], execution_time: float) -> float:
+    def _simulate_energy(self, command: List[str], execution_time: float,
+                         normals: Optional[List[float]] = None) -> float:
         """
         Generate realistic energy values for mock mode.
         
         Enhanced version that considers both GC strategy and workload.
+        `normals` is a (time, variance, noise) row; the next sequential draw if None.
         """
-        # Base power consumption for M1 MacBook
-        base_power_watts = 8.0
+        if normals is None:
+            normals = self._next_normals()
+        is_java, gc_multiplier, workload_multiplier = self._classify_command(command)
         
+        # Base power consumption for M1 MacBook;
         # Java applications increase power consumption
-        if any('java' in arg for arg in command):
-            base_power_watts = 12.0
-        
-        # Get multipliers for GC and workload
-        gc_multiplier = self._get_gc_power_multiplier(command)
-        workload_multiplier = self._get_workload_multiplier(command)
+        base_power_watts = 12.0 if is_java else 8.0
         
         # Add controlled variance for realism
-        variance_factor = random.gauss(1.0, 0.08)  # 8% standard deviation
+        variance_factor = 1.0 + 0.08 * normals[1]  # 8% standard deviation
         
         # Calculate total power and energy
         total_power = base_power_watts * gc_multiplier * workload_multiplier * variance_factor
         energy_joules = total_power * execution_time
         
         # Add measurement noise (RAPL counters have limited precision)
-        noise = random.gauss(0, 0.3)
+        noise = 0.3 * normals[2]
         final_energy = max(0.1, energy_joules + noise)
         
         return final_energy
     
-    def _get_gc_power_multiplier(self, command: List[str]) -> float:
-        """Return power multiplier based on GC strategy."""
-        command_str = ' '.join(command)
-        
-        # Based on literature: Serial often most efficient, G1 has overhead
-        if '-XX:+UseSerialGC' in command_str:
-            return 0.85  # Serial GC typically more energy efficient
-        elif '-XX:+UseParallelGC' in command_str:
-            return 1.0   # Baseline reference
-        elif '-XX:+UseG1GC' in command_str:
-            return 1.12  # G1 has slight overhead for concurrent operations
-        else:
-            return 0.95  # Default JVM GC
+    def _next_normals(self) -> List[float]:
+        """Return the next row of standard normals, refilling NOISE_BATCH rows when exhausted."""
+        if self._normals_idx == len(self._normals):
+            self._normals = self._rng.standard_normal((self.NOISE_BATCH, 3))
+            self._normals_idx = 0
+        row = self._normals[self._normals_idx].tolist()
+        self._normals_idx += 1
+        return row
     
-    def _get_workload_multiplier(self, command: List[str]) -> float:
-        """Return power multiplier based on workload intensity."""
-        command_str = ' '.join(command)
+    def _classify_command(self, command: List[str]) -> Tuple[bool, float, float]:
+        """Return (is_java, gc_multiplier, workload_multiplier) from a single pass over `command`."""
+        is_java = False
+        gc_multiplier = None
+        workload_multiplier = None
+        for arg in command:
+            if gc_multiplier is None and arg in self.GC_MULTIPLIERS:
+                gc_multiplier = self.GC_MULTIPLIERS[arg]
+            elif workload_multiplier is None and arg in self.WORKLOAD_MULTIPLIERS:
+                workload_multiplier = self.WORKLOAD_MULTIPLIERS[arg]
+            elif not is_java and 'java' in arg:
+                is_java = True
         
-        if 'light' in command_str:
-            return 1.0   # Baseline workload
-        elif 'medium' in command_str:
-            return 1.7   # Increased computation and allocation
-        elif 'heavy' in command_str:
-            return 2.4   # Intensive computation and memory pressure
-        else:
-            return 1.0   # Default
+        if gc_multiplier is None:
+            gc_multiplier = self.DEFAULT_GC_MULTIPLIER
+        if workload_multiplier is None:
+            workload_multiplier = 1.0
+        return is_java, gc_multiplier, workload_multiplier
     
     def _write_energy_csv(self, output_file: str, energy: float, execution_time: float):
         """Write energy measurement in EnergiBridge-compatible CSV format."""
         
         # Calculate derived metrics
         power_watts = energy / execution_time if execution_time > 0 else 0
-        timestamp = int(time.time())
+        timestamp = time.time_ns() // 1_000_000_000
         
-        # Write CSV in format compatible with analysis scripts
-        with open(output_file, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            
-            # Header matching EnergiBridge output format
-            writer.writerow(['timestamp', 'energy_joules', 'power_watts', 'execution_time'])
-            
-            # Data row
-            writer.writerow([
-                timestamp,
-                f"{energy:.6f}",
-                f"{power_watts:.6f}", 
-                f"{execution_time:.6f}"
-            ])
+        # Static header matching EnergiBridge output format plus one pre-formatted data row,
+        # written in a single writev call; rows end in '\r\n' like csv.writer's default dialect.
+        # The write is synchronous on purpose: it only reaches the page cache (no fsync), and
+        # runs execute in forked processes where a writer thread started at init would not exist
+        row = f"{timestamp},{energy:.6f},{power_watts:.6f},{execution_time:.6f}\r\n".encode('ascii')
+        fd = os.open(output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            if hasattr(os, 'writev'):
+                os.writev(fd, [self.CSV_HEADER, row])
+            else:  # Windows has no writev
+                os.write(fd, self.CSV_HEADER + row)
+        finally:
+            os.close(fd)
     
     def get_experiment_metadata(self) -> Dict[str, Any]:
         """Return metadata about current measurement configuration."""
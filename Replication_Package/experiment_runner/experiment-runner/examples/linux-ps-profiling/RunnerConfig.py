@@ -5,16 +5,19 @@ from ConfigValidator.Config.Models.FactorModel import FactorModel
 from ConfigValidator.Config.Models.RunnerContext import RunnerContext
 from ConfigValidator.Config.Models.OperationType import OperationType
 from ProgressManager.Output.OutputProcedure import OutputProcedure as output
-from Plugins.Profilers.Ps import Ps
 
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 from os.path import dirname, realpath
 
-import numpy as np
-import time
+import pandas as pd
+import psutil
 import subprocess
 import shlex
+import inspect
+import operator
+import os
+import threading
 
 
 class RunnerConfig:
@@ -36,6 +39,11 @@ class RunnerConfig:
     This can be essential to accommodate for cooldown periods on some systems."""
     time_between_runs_in_ms:    int             = 1000
 
+    """Seconds between two samples of the target's CPU and memory usage. The first sample is taken
+    right away, over `first_sample_window_s`, so short-lived targets still get one."""
+    sample_interval_s:          float           = 1.0
+    first_sample_window_s:      float           = 0.1
+
     # Dynamic configurations can be one-time satisfied here before the program takes the config as-is
     # e.g. Setting some variable based on some criteria
     def __init__(self):
@@ -53,6 +61,13 @@ class RunnerConfig:
             (RunnerEvents.AFTER_EXPERIMENT , self.after_experiment )
         ])
         self.run_table_model = None  # Initialized later
+
+        # Where the context keeps the run configuration, resolved once from the RunnerContext
+        # constructor instead of probing every run (each run is forked from this process)
+        context_params = inspect.signature(RunnerContext).parameters
+        variation_attr = next((attr for attr in ('run_variation', 'experiment_variation') if attr in context_params), None)
+        self._variation_getter = operator.attrgetter(variation_attr) if variation_attr else (lambda context: None)
+
         output.console_log("Custom config loaded")
 
     def create_run_table_model(self) -> RunTableModel:
@@ -73,7 +88,11 @@ class RunnerConfig:
         """Perform any activity required before starting the experiment here
         Invoked only once during the lifetime of the program."""
 
-        # compile the target program
+        # compile the target program, unless the binary is newer than its sources and the Makefile
+        target = self.ROOT_DIR / 'primer'
+        sources = [*self.ROOT_DIR.glob('*.[ch]'), self.ROOT_DIR / 'Makefile']
+        if target.exists() and target.stat().st_mtime >= max(s.stat().st_mtime for s in sources):
+            return
         subprocess.check_call(['make'], cwd=self.ROOT_DIR)
 
     def before_run(self) -> None:
@@ -84,27 +103,17 @@ class RunnerConfig:
     def start_run(self, context: RunnerContext) -> None:
         """Perform any activity required for starting the run"""
         
-        # Debug: Print available context attributes
-        output.console_log(f"Context attributes: {dir(context)}")
+        # Debug: Print available context attributes (GL_DEBUG=1)
+        if os.getenv('GL_DEBUG'):
+            output.console_log(f"Context attributes: {dir(context)}")
         
-        # Try different ways to access run configuration
         try:
-            # Method 1: Check if there's a run_variation attribute
-            if hasattr(context, 'run_variation'):
-                gc_strategy = context.run_variation['gc_strategy']
-                workload = context.run_variation['workload'] 
-                jdk_impl = context.run_variation['jdk_implementation']
-            # Method 2: Check if there's experiment_variation
-            elif hasattr(context, 'experiment_variation'):
-                gc_strategy = context.experiment_variation['gc_strategy']
-                workload = context.experiment_variation['workload']
-                jdk_impl = context.experiment_variation['jdk_implementation']
-            # Method 3: Check if parameters are direct attributes
+            variation = self._variation_getter(context)
+            if variation is not None:
+                gc_strategy = variation['gc_strategy']
+                workload = variation['workload']
+                jdk_impl = variation['jdk_implementation']
             else:
-                output.console_log("Available context attributes:")
-                for attr in dir(context):
-                    if not attr.startswith('_'):
-                        output.console_log(f"  {attr}: {getattr(context, attr, 'N/A')}")
                 # Use defaults for now
                 gc_strategy = 'G1GC'
                 workload = 'light'
@@ -133,25 +142,31 @@ class RunnerConfig:
     def start_measurement(self, context: RunnerContext) -> None:
         """Perform any activity required for starting measurements."""
         
-        # Set up the ps object, provide an (optional) target and output file name
-        self.meter = Ps(out_file=context.run_dir / "ps.csv",
-                        target_pid=[self.target.pid])
-        # Start measuring with ps
-        self.meter.start()
+        # Sample the target in-process through psutil (/proc reads) instead of forking `ps` every interval
+        self.samples = []
+        self.stop_sampling = threading.Event()
+        self.sampler = threading.Thread(target=self._sample_target, args=(psutil.Process(self.target.pid),))
+        self.sampler.start()
 
     def interact(self, context: RunnerContext) -> None:
         """Perform any interaction with the running target system here, or block here until the target finishes."""
 
-        # No interaction. We just run it for XX seconds.
-        # Another example would be to wait for the target to finish, e.g. via `self.target.wait()`
+        # No interaction. We just run it for up to 20 seconds, returning early if the target exits.
         output.console_log("Running program for 20 seconds")
-        time.sleep(20)
+        try:
+            self.target.wait(timeout=20)
+            output.console_log("Target exited before the end of the window")
+        except subprocess.TimeoutExpired:
+            pass
 
     def stop_measurement(self, context: RunnerContext) -> None:
         """Perform any activity here required for stopping measurements."""
 
-        # Stop the measurements
-        stdout = self.meter.stop()
+        # Stop the measurements and write the samples as the headerless ps.csv (%cpu,%mem)
+        self.stop_sampling.set()
+        self.sampler.join()
+        with open(context.run_dir / "ps.csv", 'w') as f:
+            f.writelines(f"{cpu:.1f},{mem:.1f}\n" for cpu, mem in self.samples)
 
     def stop_run(self, context: RunnerContext) -> None:
         """Perform any activity here required for stopping the run.
@@ -165,12 +180,18 @@ class RunnerConfig:
         You can also store the raw measurement data under `context.run_dir`
         Returns a dictionary with keys `self.run_table_model.data_columns` and their values populated"""
 
-        results = self.meter.parse_log(context.run_dir / "ps.csv", 
-                                       column_names=["cpu_usage", "memory_usage"])
+        # Read the headerless ps log straight into columns; Ps.parse_log would build a dict per column first
+        try:
+            samples = pd.read_csv(context.run_dir / "ps.csv", names=["cpu_usage", "memory_usage"])
+        except pd.errors.EmptyDataError:  # Raised for an empty file by some pandas versions
+            samples = pd.DataFrame()
+        if samples.empty:
+            output.console_log("No CPU/memory samples were taken (target exited before the first one)")
+            return {"avg_cpu": None, "avg_mem": None}
 
         return {
-            "avg_cpu": round(np.mean(list(results['cpu_usage'].values())), 3),
-            "avg_mem": round(np.mean(list(results['memory_usage'].values())), 3)
+            "avg_cpu": round(float(samples['cpu_usage'].mean()), 3),
+            "avg_mem": round(float(samples['memory_usage'].mean()), 3)
         }
 
     def after_experiment(self) -> None:
@@ -178,5 +199,18 @@ class RunnerConfig:
         Invoked only once during the lifetime of the program."""
         pass
 
+    def _sample_target(self, proc: psutil.Process) -> None:
+        """Append (%cpu, %mem) of `proc` to `self.samples`: once right away, then every `sample_interval_s`
+        until stop_measurement. %cpu is the usage since the previous sample (100 = one full core),
+        not ps's average over the process lifetime."""
+        try:
+            # Blocks for the short first window instead of returning a meaningless 0.0
+            self.samples.append((proc.cpu_percent(self.first_sample_window_s), proc.memory_percent()))
+            while not self.stop_sampling.wait(self.sample_interval_s):
+                with proc.oneshot():
+                    self.samples.append((proc.cpu_percent(None), proc.memory_percent()))
+        except psutil.NoSuchProcess:
+            pass  # Target exited; keep the samples taken so far
+
     # ================================ DO NOT ALTER BELOW THIS LINE ================================
     experiment_path:            Path             = None
@@ -9,8 +9,11 @@ from ProgressManager.Output.OutputProcedure import OutputProcedure as output
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 from os.path import dirname, realpath
+import io
 import os
+import shlex
 import subprocess
+import threading
 import time
 
 
@@ -23,6 +26,15 @@ class RunnerConfig:
     operation_type: OperationType = OperationType.AUTO
     time_between_runs_in_ms: int = 120000  # 2 minutes cooldown
 
+    # Subjects, and the subset run through the service-app script instead of the benchmark one
+    SUBJECTS = ['DaCapo', 'CLBG-BinaryTrees', 'CLBG-Fannkuch', 'CLBG-NBody', 'Rosetta',
+                'PetClinic', 'TodoApp', 'ANDIE']
+    SERVICE_SUBJECTS = ('PetClinic', 'TodoApp', 'ANDIE')
+
+    # Console separators
+    RULE = "="*60
+    THIN_RULE = "─"*50
+
     def __init__(self):
         """Executes immediately after program start, on config load"""
         EventSubscriptionController.subscribe_to_multiple_events([
@@ -40,22 +52,38 @@ class RunnerConfig:
         self.current_batch = 1
         self.runs_in_batch = 0
         self.BATCH_SIZE = 6 # 6 reps (manual stop at 4)
+
+        # DUT settings, read from the environment once at config load
+        self.laptop_user = os.getenv('LAPTOP_USER', 'your_username')
+        self.laptop_host = os.getenv('LAPTOP_HOST', '192.168.1.100')
+        self.laptop_exp_dir = os.getenv('LAPTOP_EXPERIMENT_DIR', '/home/your_username/gc_experiment')
+        self.ssh_target = f'{self.laptop_user}@{self.laptop_host}'
+
+        # Per-subject DUT command templates; each run only fills in the remaining factors
+        self._cmd_tmpl = {}
+        for subject in self.SUBJECTS:
+            script_name = ("Service_Apps_Run_Single_Experiment.sh" if subject in self.SERVICE_SUBJECTS
+                           else "Run_Single_Experiment.sh")
+            self._cmd_tmpl[subject] = (f"cd {self.laptop_exp_dir} && "
+                                       f"./{script_name} {shlex.quote(subject)} {{gc}} {{workload}} {{jdk}} {{rep}} {{run_num}}")
+
+        # Per-run log lines are buffered and written in blocks (see _flush_log)
+        self._log = io.StringIO()
+
+        # Persistent SSH connection (OpenSSH ControlMaster), opened in before_experiment
+        self.ssh_ctrl_path = f"/tmp/gc_{os.getpid()}.sock"
+        self._ssh_base = ['ssh', '-o', f'ControlPath={self.ssh_ctrl_path}']
         output.console_log("Custom config loaded (Dual-script configuration)")
 
     # ---------------------------------------------------------------------
     # Experiment Definition
     # ---------------------------------------------------------------------
     def create_run_table_model(self) -> RunTableModel:
-        subject_factor = FactorModel("subject", [
-            'DaCapo', 
-            'CLBG-BinaryTrees', 
-            'CLBG-Fannkuch', 
-            'CLBG-NBody',
-            'Rosetta',
-            'PetClinic', 
-            'TodoApp',
-            'ANDIE'
-        ])
+        # Built once; later calls reuse the model and the run counts derived from it
+        if self.run_table_model is not None:
+            return self.run_table_model
+
+        subject_factor = FactorModel("subject", self.SUBJECTS)
         gc_factor = FactorModel("gc", ['Serial', 'Parallel', 'G1'])
         workload_factor = FactorModel("workload", ['Light', 'Medium', 'Heavy'])
         jdk_factor = FactorModel("jdk", ['openjdk', 'oracle'])
@@ -65,28 +93,35 @@ class RunnerConfig:
             exclude_variations=[],
             data_columns=['energy_j', 'runtime_s', 'status', 'batch_num']
         )
+        self._total_runs = len(self.run_table_model.get_all_rows())
+        self._total_batches = (self._total_runs + self.BATCH_SIZE - 1) // self.BATCH_SIZE
         return self.run_table_model
 
     # ---------------------------------------------------------------------
     # Before Experiment
     # ---------------------------------------------------------------------
     def before_experiment(self) -> None:
-        output.console_log("="*60)
+        output.console_log(self.RULE)
         output.console_log("JAVA GC ENERGY EXPERIMENT - GREEN LAB 2025")
-        output.console_log("="*60)
-        total_runs = len(self.run_table_model.get_all_rows())
-        total_batches = (total_runs + self.BATCH_SIZE - 1) // self.BATCH_SIZE
-        output.console_log(f"Total runs planned: {total_runs}")
+        output.console_log(self.RULE)
+        output.console_log(f"Total runs planned: {self._total_runs}")
         output.console_log(f"Batch size: {self.BATCH_SIZE} runs")
-        output.console_log(f"Total batches: {total_batches}")
+        output.console_log(f"Total batches: {self._total_batches}")
         output.console_log(f"Results path: {self.results_output_path}")
         output.console_log("")
 
-        laptop_user = os.getenv('LAPTOP_USER', 'your_username')
-        laptop_host = os.getenv('LAPTOP_HOST', '192.168.1.100')
         try:
+            # Open the master connection once; every later ssh/scp reuses it
+            subprocess.run(
+                ['ssh', '-MNf',
+                 '-o', f'ControlPath={self.ssh_ctrl_path}',
+                 '-o', 'ControlMaster=yes',
+                 '-o', 'ControlPersist=600',
+                 self.ssh_target],
+                timeout=30
+            )
             result = subprocess.run(
-                ['ssh', f'{laptop_user}@{laptop_host}', 'echo "SSH test successful"'],
+                ['ssh', '-O', 'check', '-o', f'ControlPath={self.ssh_ctrl_path}', self.ssh_target],
                 capture_output=True, text=True, timeout=10
             )
             if result.returncode == 0:
@@ -102,6 +137,12 @@ class RunnerConfig:
     # ---------------------------------------------------------------------
     def before_run(self) -> None:
         if self.runs_in_batch >= self.BATCH_SIZE:
+            # Pull the finished batch's energy traces while waiting for the operator. The thread runs
+            # in the parent (this hook is not forked) and is joined before the next run is forked.
+            trace_fetch = threading.Thread(target=self._fetch_energy_traces,
+                                           args=((self.current_batch - 1) * self.BATCH_SIZE + 1,
+                                                 self.current_batch * self.BATCH_SIZE))
+            trace_fetch.start()
             output.console_log("")
             output.console_log(f"║  BATCH {self.current_batch} COMPLETE ({self.BATCH_SIZE} runs) ║")
             output.console_log("║  Press ENTER to continue ║")
@@ -113,135 +154,129 @@ class RunnerConfig:
             except KeyboardInterrupt:
                 output.console_log("\n✗ Experiment stopped by user")
                 raise
-        output.console_log("")
-        output.console_log("─"*50)
-        output.console_log("Preparing for next run...")
+            finally:
+                # Also on Ctrl-C, so the batch's traces are complete on disk before exiting
+                trace_fetch.join()
+        self._log_line("")
+        self._log_line(self.THIN_RULE)
+        self._log_line("Preparing for next run...")
+        self._flush_log()
+
+        # Counted here, in the parent: start_run runs in the forked run process, so a count
+        # kept there never reaches the batch check above
+        self.runs_in_batch += 1
 
     # ---------------------------------------------------------------------
     # Start Run
     # ---------------------------------------------------------------------
     def start_run(self, context: RunnerContext) -> None:
-        self.runs_in_batch += 1
-        output.console_log("")
-        output.console_log("="*60)
-        output.console_log(f"STARTING RUN #{context.run_nr} (Batch {self.current_batch}, Run {self.runs_in_batch}/{self.BATCH_SIZE})")
-        output.console_log("="*60)
-        output.console_log(f"Subject:  {context.run_variation['subject']}")
-        output.console_log(f"GC:       {context.run_variation['gc']}")
-        output.console_log(f"Workload: {context.run_variation['workload']}")
-        output.console_log(f"JDK:      {context.run_variation['jdk']}")
-        output.console_log(f"Rep:      {context.run_variation['__rep__']}")
-        output.console_log("")
+        self._log_line("")
+        self._log_line(self.RULE)
+        self._log_line(f"STARTING RUN #{context.run_nr} (Batch {self.current_batch}, Run {self.runs_in_batch}/{self.BATCH_SIZE})")
+        self._log_line(self.RULE)
+        self._log_line(f"Subject:  {context.run_variation['subject']}")
+        self._log_line(f"GC:       {context.run_variation['gc']}")
+        self._log_line(f"Workload: {context.run_variation['workload']}")
+        self._log_line(f"JDK:      {context.run_variation['jdk']}")
+        self._log_line(f"Rep:      {context.run_variation['__rep__']}")
+        self._log_line("")
 
     # ---------------------------------------------------------------------
     # Start Measurement (Decides which shell file to execute)
     # ---------------------------------------------------------------------
     def start_measurement(self, context: RunnerContext) -> None:
-        output.console_log("Starting energy measurement...")
-
-        laptop_user = os.getenv('LAPTOP_USER', 'your_username')
-        laptop_host = os.getenv('LAPTOP_HOST', '192.168.1.100')
-        laptop_exp_dir = os.getenv('LAPTOP_EXPERIMENT_DIR', '/home/your_username/gc_experiment')
-
-        subject = context.run_variation['subject']
-        gc = context.run_variation['gc']
-        workload = context.run_variation['workload']
-        jdk = context.run_variation['jdk']
-        rep = context.run_variation['__rep__']
-        run_num = context.run_nr
-
-        # Decide which script to use
-        if subject in ["PetClinic", "TodoApp", "ANDIE"]:
-            script_name = "Service_Apps_Run_Single_Experiment.sh"
-        else:
-            script_name = "Run_Single_Experiment.sh"
+        self._log_line("Starting energy measurement...")
 
-        remote_cmd = (
-            f"cd {laptop_exp_dir} && "
-            f"./{script_name} {subject} {gc} {workload} {jdk} {rep} {run_num}"
+        # The subject's template already selects the script (service app vs benchmark)
+        variation = context.run_variation
+        remote_cmd = self._cmd_tmpl[variation['subject']].format(
+            gc=shlex.quote(variation['gc']),
+            workload=shlex.quote(variation['workload']),
+            jdk=shlex.quote(variation['jdk']),
+            rep=shlex.quote(str(variation['__rep__'])),
+            run_num=context.run_nr
         )
 
-        output.console_log(f"Executing on DUT: {remote_cmd}")
+        self._log_line(f"Executing on DUT: {remote_cmd}")
         context.ssh_command = remote_cmd
-        context.laptop_user = laptop_user
-        context.laptop_host = laptop_host
-        context.laptop_exp_dir = laptop_exp_dir
         context.batch_num = self.current_batch
 
     # ---------------------------------------------------------------------
     # Interact (wait for DUT to finish)
     # ---------------------------------------------------------------------
     def interact(self, context: RunnerContext) -> None:
-        ssh_cmd = ['ssh', f'{context.laptop_user}@{context.laptop_host}', context.ssh_command]
-        output.console_log("Waiting for experiment to complete on DUT...")
+        ssh_cmd = self._ssh_base + [self.ssh_target, context.ssh_command]
+        self._log_line("Waiting for experiment to complete on DUT...")
+        self._flush_log()
+        # DUT output goes straight to files in the run directory instead of being buffered here
+        stdout_path = context.run_dir / "ssh_stdout.log"
+        stderr_path = context.run_dir / "ssh_stderr.log"
         try:
-            result = subprocess.run(ssh_cmd, capture_output=True, text=True, timeout=5400)  # 90 min
+            with open(stdout_path, 'wb') as so, open(stderr_path, 'wb') as se:
+                result = subprocess.run(ssh_cmd, stdin=subprocess.DEVNULL, stdout=so, stderr=se,
+                                        timeout=5400)  # 90 min
             context.ssh_returncode = result.returncode
-            context.ssh_stdout = result.stdout
-            context.ssh_stderr = result.stderr
+            context.ssh_stderr = ""
             if result.returncode == 0:
-                output.console_log("✓ Run completed successfully on DUT")
+                self._log_line("✓ Run completed successfully on DUT")
             else:
-                output.console_log(f"✗ Run FAILED with return code {result.returncode}")
-                output.console_log(f"  stderr: {result.stderr[:500]}")
+                context.ssh_stderr = self._read_tail(stderr_path, 500)
+                self._log_line(f"✗ Run FAILED with return code {result.returncode}")
+                self._log_line(f"  stderr: {context.ssh_stderr}")
         except subprocess.TimeoutExpired:
-            output.console_log("✗ Run TIMEOUT")
+            self._log_line("✗ Run TIMEOUT")
             context.ssh_returncode = -1
-            context.ssh_stdout = ""
             context.ssh_stderr = "TIMEOUT"
 
     # ---------------------------------------------------------------------
     # Stop Measurement (retrieve results)
     # ---------------------------------------------------------------------
     def stop_measurement(self, context: RunnerContext) -> None:
-        output.console_log("Retrieving results from DUT...")
+        self._log_line("Retrieving results from DUT...")
         if context.ssh_returncode == 0:
-            remote_result_dir = f"{context.laptop_exp_dir}/results/run_{context.run_nr}"
+            remote_result_dir = f"{self.laptop_exp_dir}/results/run_{context.run_nr}"
             local_result_dir = context.run_dir / "dut_results"
-            local_result_dir.mkdir(parents=True, exist_ok=True)
-
-            for fname in ['energy.csv', 'result.csv']:
-                scp_cmd = [
-                    'scp',
-                    f'{context.laptop_user}@{context.laptop_host}:{remote_result_dir}/{fname}',
-                    str(local_result_dir / fname)
-                ]
-                result = subprocess.run(scp_cmd, capture_output=True)
-                if result.returncode == 0:
-                    output.console_log(f"  ✓ Retrieved {fname}")
-                else:
-                    output.console_log(f"  ✗ Failed to retrieve {fname}")
+            local_result_dir.mkdir(exist_ok=True)  # run_dir itself is created by the framework
+
+            # Only result.csv is needed per run; energy traces come in bulk via _fetch_energy_traces
+            self._tar_fetch(self.ssh_target, remote_result_dir, ['result.csv'], local_result_dir)
+            if (local_result_dir / 'result.csv').exists():
+                self._log_line("  ✓ Retrieved result.csv")
+            else:
+                self._log_line("  ✗ Failed to retrieve result.csv")
 
     # ---------------------------------------------------------------------
     # Stop Run
     # ---------------------------------------------------------------------
     def stop_run(self, context: RunnerContext) -> None:
-        output.console_log("")
-        output.console_log(f"Run #{context.run_nr} complete (Batch {self.current_batch})")
-        output.console_log("─"*50)
+        self._log_line("")
+        self._log_line(f"Run #{context.run_nr} complete (Batch {self.current_batch})")
+        self._log_line(self.THIN_RULE)
 
     # ---------------------------------------------------------------------
     # Populate Run Data
     # ---------------------------------------------------------------------
     def populate_run_data(self, context: RunnerContext) -> Optional[Dict[str, Any]]:
-        output.console_log("Parsing run data...")
+        self._log_line("Parsing run data...")
         run_data = {'energy_j': None, 'runtime_s': None, 'status': 'FAILED', 'batch_num': self.current_batch}
         result_file = context.run_dir / "dut_results" / "result.csv"
-        if result_file.exists():
-            try:
-                with open(result_file, 'r') as f:
-                    parts = f.read().strip().split(',')
-                if len(parts) >= 9:
-                    run_data['runtime_s'] = float(parts[6]) if parts[6] != 'FAILED' else None
-                    run_data['energy_j'] = float(parts[7]) if parts[7] != 'FAILED' else None
-                    run_data['status'] = parts[8]
-                    output.console_log(f"  Runtime: {run_data['runtime_s']}s")
-                    output.console_log(f"  Energy:  {run_data['energy_j']}J")
-                    output.console_log(f"  Status:  {run_data['status']}")
-            except Exception as e:
-                output.console_log(f"  ✗ Error parsing results: {e}")
-        else:
-            output.console_log("  ✗ Result file not found")
+        try:
+            with open(result_file, 'r') as f:
+                # Format: run_num,subject,gc,workload,jdk,rep,runtime_s,energy_j,status,timestamp
+                # energy_j is EnergiBridge's per-run total in Joules; no raw counter values reach the host
+                parts = f.readline().rstrip().split(',', 9)
+            if len(parts) >= 9:
+                run_data['runtime_s'] = float(parts[6]) if parts[6] != 'FAILED' else None
+                run_data['energy_j'] = float(parts[7]) if parts[7] != 'FAILED' else None
+                run_data['status'] = parts[8]
+                self._log_line(f"  Runtime: {run_data['runtime_s']}s")
+                self._log_line(f"  Energy:  {run_data['energy_j']}J")
+                self._log_line(f"  Status:  {run_data['status']}")
+        except FileNotFoundError:
+            self._log_line("  ✗ Result file not found")
+        except Exception as e:
+            self._log_line(f"  ✗ Error parsing results: {e}")
+        self._flush_log()
         return run_data
 
     # ---------------------------------------------------------------------
@@ -249,10 +284,12 @@ class RunnerConfig:
     # ---------------------------------------------------------------------
     def after_experiment(self) -> None:
         output.console_log("")
-        output.console_log("="*60)
+        output.console_log(self.RULE)
         output.console_log("EXPERIMENT COMPLETED")
-        output.console_log("="*60)
+        output.console_log(self.RULE)
         output.console_log(f"Total batches executed: {self.current_batch}")
+        # Earlier batches were fetched at their review; only the last batch's traces remain
+        self._fetch_energy_traces((self.current_batch - 1) * self.BATCH_SIZE + 1, self._total_runs)
         output.console_log(f"Results saved to: {self.results_output_path}")
         output.console_log("")
         output.console_log("Next steps:")
@@ -261,5 +298,62 @@ class RunnerConfig:
         output.console_log("  3. Begin statistical analysis in R")
         output.console_log("")
 
+        # Tear down the persistent SSH connection
+        subprocess.run(
+            ['ssh', '-O', 'exit', '-o', f'ControlPath={self.ssh_ctrl_path}', self.ssh_target],
+            capture_output=True
+        )
+
+    # ---------------------------------------------------------------------
+    # Helpers
+    # ---------------------------------------------------------------------
+    def _log_line(self, txt: str) -> None:
+        """Buffer a per-run log line until the next `_flush_log`."""
+        self._log.write(txt + '\n')
+
+    def _flush_log(self) -> None:
+        """Write the buffered per-run log lines to the console in one call."""
+        if self._log.tell():
+            output.console_log(self._log.getvalue().rstrip('\n'))
+            self._log = io.StringIO()
+
+    @staticmethod
+    def _read_tail(path: Path, nbytes: int) -> str:
+        """Return the last `nbytes` of a file as text."""
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - nbytes))
+            return f.read().decode(errors='replace')
+
+    def _tar_fetch(self, target: str, remote_dir: str, fnames: List[str], local_dir: Path) -> None:
+        """Stream `fnames` from `remote_dir` on the DUT as one tar archive and unpack it into `local_dir`."""
+        ssh = subprocess.Popen(self._ssh_base + [target, f"tar -C {remote_dir} -cf - {' '.join(fnames)}"],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        subprocess.run(['tar', '-xf', '-', '-C', str(local_dir)], stdin=ssh.stdout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        ssh.stdout.close()
+        ssh.wait()
+
+    def _fetch_energy_traces(self, first_run: int, last_run: int) -> None:
+        """Stream the energy.csv files of runs `first_run`..`last_run` from the DUT as one
+        gzip-compressed tar into `<results_output_path>/<name>/dut_results/run_<n>/energy.csv`."""
+        stage_dir = self.results_output_path / self.name / 'dut_results'
+        stage_dir.mkdir(parents=True, exist_ok=True)
+        output.console_log("Retrieving energy traces from DUT...")
+        # Only the requested run numbers; earlier batches and other run_* dirs on the DUT are left alone
+        remote_tar = (f"cd {self.laptop_exp_dir}/results && "
+                      f"for n in $(seq {first_run} {last_run}); do "
+                      f"[ -f run_$n/energy.csv ] && echo run_$n/energy.csv; done | tar -czf - -T -")
+        ssh = subprocess.Popen(self._ssh_base + [self.ssh_target, remote_tar],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        untar = subprocess.run(['tar', '-xzf', '-', '-C', str(stage_dir)], stdin=ssh.stdout,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        ssh.stdout.close()
+        ssh.wait()
+        if ssh.returncode == 0 and untar.returncode == 0:
+            output.console_log(f"  ✓ Energy traces saved to: {stage_dir}")
+        else:
+            output.console_log("  ✗ Failed to retrieve energy traces")
+
     # ================================ DO NOT ALTER BELOW THIS LINE ================================
     experiment_path: Path = None